@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+import pathlib
+import time
+import tracemalloc
+
+from jotform_summary.compact import CompactRows, compact_values_iter
+from jotform_summary.csv_mapping import compile_manifest
+
+SUBMISSIONS = 2000
+
+
+def main():
+    with pathlib.Path("test_data/gottman_manifest.json").open() as f:
+        compiled = compile_manifest(json.load(f))
+    with pathlib.Path("test_data/submission.csv").open(newline="") as f:
+        header, *submissions = list(csv.reader(f))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for i in range(SUBMISSIONS):
+        writer.writerow(submissions[i % len(submissions)])
+    export = buffer.getvalue()
+
+    for name, load, score in (
+        (
+            "list rows",
+            lambda: list(csv.reader(io.StringIO(export))),
+            lambda rows: compiled.values_iter(header, rows),
+        ),
+        (
+            "compact rows",
+            lambda: CompactRows.from_rows(csv.reader(io.StringIO(export))),
+            lambda rows: compact_values_iter(compiled, header, rows),
+        ),
+    ):
+        tracemalloc.start()
+        rows = load()
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        for _ in score(rows):
+            pass
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name}: {retained / SUBMISSIONS / 1024:.1f} KiB/submission, "
+            f"{elapsed / SUBMISSIONS * 1e6:.1f} us/submission to preload and score"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import csv
+import json
+import pathlib
+import timeit
+
+from jotform_summary.csv_mapping import Loader, compile_manifest
+
+SUBMISSIONS = 2000
+
+
+def main():
+    with pathlib.Path("test_data/gottman_manifest.json").open() as f:
+        manifest = json.load(f)
+    with pathlib.Path("test_data/submission.csv").open() as f:
+        header, *submissions = list(csv.reader(f))
+
+    def per_submission_validation():
+        for i in range(SUBMISSIONS):
+            row = list(submissions[i % len(submissions)])
+            Loader(manifest, [header, row]).get_string()
+
+    compiled = compile_manifest(manifest)
+
+    def compiled_once():
+        for i in range(SUBMISSIONS):
+            row = list(submissions[i % len(submissions)])
+            Loader(compiled, [header, row]).get_string()
+
+    for name, bench in (
+        ("Loader(dict) per submission", per_submission_validation),
+        ("Loader(CompiledManifest)", compiled_once),
+    ):
+        seconds = min(timeit.repeat(bench, number=1, repeat=3))
+        print(f"{name}: {seconds / SUBMISSIONS * 1e6:.1f} us/submission")
+
+
+if __name__ == "__main__":
+    main()
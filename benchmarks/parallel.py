@@ -0,0 +1,73 @@
+import csv
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_export
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.parallel import score_parallel
+
+SUBMISSIONS = 20000
+CHUNK_SIZE = 500
+
+
+def main():
+    with pathlib.Path("test_data/gottman_manifest.json").open() as f:
+        compiled = compile_manifest(json.load(f))
+    with pathlib.Path("test_data/submission.csv").open() as f:
+        header, *submissions = list(csv.reader(f))
+
+    def rows():
+        for i in range(SUBMISSIONS):
+            yield list(submissions[i % len(submissions)])
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+        worker_counts.append(worker_counts[-1] * 2)
+
+    start = time.perf_counter()
+    for _ in compiled.score_iter(header, rows()):
+        pass
+    serial = time.perf_counter() - start
+    print(f"serial: {SUBMISSIONS / serial:.0f} submissions/s")
+
+    for workers in worker_counts:
+        start = time.perf_counter()
+        for _ in score_parallel(compiled, header, rows(), workers, CHUNK_SIZE):
+            pass
+        elapsed = time.perf_counter() - start
+        print(
+            f"workers={workers}: {SUBMISSIONS / elapsed:.0f} submissions/s "
+            f"({serial / elapsed:.2f}x serial)"
+        )
+
+    # the whole `score --workers N` command, parsing included, on an export
+    # file the workers read their own byte ranges of
+    with tempfile.TemporaryDirectory() as tmp:
+        export = pathlib.Path(tmp) / "export.csv"
+        generate_export(export, SUBMISSIONS)
+        args = [
+            sys.executable, "-m", "jotform_summary.main", "score", str(export),
+            "--manifest", "test_data/gottman_manifest.json", "--no-cache",
+            "--chunk-size", str(CHUNK_SIZE), "-o", os.devnull,
+        ]
+        subprocess.run([*args[:3], "index", str(export)], check=True)
+        command_serial = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            subprocess.run([*args, "--workers", str(workers)], check=True)
+            elapsed = time.perf_counter() - start
+            command_serial = command_serial or elapsed
+            print(
+                f"score --workers {workers}: "
+                f"{SUBMISSIONS / elapsed:.0f} submissions/s "
+                f"({command_serial / elapsed:.2f}x --workers 1)"
+            )
+
+
+if __name__ == "__main__":
+    main()
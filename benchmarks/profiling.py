@@ -0,0 +1,39 @@
+import io
+import time
+
+from benchmarks.synthetic import manifests, write_export
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.profiling import Profile
+from jotform_summary.reader import read_export
+
+SUBMISSIONS = 5000
+REPEAT = 5
+
+
+def main():
+    buffer = io.StringIO()
+    write_export(buffer, SUBMISSIONS)
+    buffer.seek(0)
+    header, *submissions = list(read_export(buffer))
+    compiled = compile_manifest(manifests()["gottman"])
+    profiled = Profile().instrument(compile_manifest(manifests()["gottman"]))
+    rows = list(compiled.project(header, submissions))
+
+    # "disabled" is the default CLI path: the profiling module is imported
+    # but the manifest is not instrumented
+    for name, manifest in (("disabled", compiled), ("enabled", profiled)):
+        timings = []
+        for _ in range(REPEAT):
+            copies = [list(row) for row in rows]
+            start = time.perf_counter()
+            for _ in manifest.values_iter(header, copies, projected=True):
+                pass
+            timings.append(time.perf_counter() - start)
+        print(
+            f"profiling {name}: "
+            f"{min(timings) / SUBMISSIONS * 1e6:.2f} us/submission"
+        )
+
+
+if __name__ == "__main__":
+    main()
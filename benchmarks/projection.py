@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+import pathlib
+import time
+import tracemalloc
+
+from jotform_summary.csv_mapping import compile_manifest
+
+SUBMISSIONS = 2000
+
+
+def main():
+    with pathlib.Path("test_data/gottman_manifest.json").open() as f:
+        compiled = compile_manifest(json.load(f))
+    with pathlib.Path("test_data/submission.csv").open() as f:
+        header, *submissions = list(csv.reader(f))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for i in range(SUBMISSIONS):
+        writer.writerow(submissions[i % len(submissions)])
+    export = buffer.getvalue()
+    columns = compiled.columns(header)
+    print(f"manifest references {len(columns)} of {len(header)} columns")
+
+    for name, read in (
+        ("full rows", lambda: list(csv.reader(io.StringIO(export)))),
+        ("projected rows", lambda: list(
+            compiled.project(header, csv.reader(io.StringIO(export)))
+        )),
+    ):
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = read()
+        elapsed = time.perf_counter() - start
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del rows
+        print(
+            f"{name}: {retained / SUBMISSIONS / 1024:.1f} KiB/submission retained, "
+            f"{elapsed / SUBMISSIONS * 1e6:.1f} us/submission to parse"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import csv
+import io
+import json
+import pathlib
+import tempfile
+import time
+
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.sinks import JsonLinesSink, SqliteSink
+
+SUBMISSIONS = 1_000_000
+
+
+def main():
+    with pathlib.Path("test_data/gottman_manifest.json").open() as f:
+        compiled = compile_manifest(json.load(f))
+    with pathlib.Path("test_data/submission.csv").open(newline="") as f:
+        header, *submissions = list(csv.reader(f))
+    output_steps = compiled.output_steps(header)
+    scored = [compiled.values([header, list(row)]) for row in submissions]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, sink in (
+            ("jsonl", JsonLinesSink(io.StringIO())),
+            ("sqlite", SqliteSink(pathlib.Path(tmp) / "scores.sqlite")),
+        ):
+            start = time.perf_counter()
+            sink.start(output_steps)
+            for i in range(SUBMISSIONS):
+                sink.write(scored[i % len(scored)])
+            sink.finish()
+            elapsed = time.perf_counter() - start
+            if isinstance(sink, SqliteSink):
+                sink.close()
+            print(f"{name}: {SUBMISSIONS / elapsed:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
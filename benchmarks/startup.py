@@ -0,0 +1,51 @@
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_export
+
+RUNS = 10
+
+
+def invoke(args: list, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "jotform_summary.main", *args],
+        env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    # one scored submission per invocation, as a webhook-driven cron runs it;
+    # cold starts have an empty manifest cache, warm ones reuse it
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = pathlib.Path(tmp)
+        export = tmp_dir / "export.csv"
+        generate_export(export, 10)
+        cache_home = tmp_dir / "cache"
+        env = {**os.environ, "XDG_CACHE_HOME": str(cache_home)}
+        args = [
+            "score", str(export), "--manifest", "test_data/gottman_manifest.json",
+            "--submission", "0", "--no-cache",
+        ]
+        invoke(["index", str(export)], env)
+
+        cold = []
+        for _ in range(RUNS):
+            shutil.rmtree(cache_home, ignore_errors=True)
+            cold.append(invoke(args, env))
+        warm = [invoke(args, env) for _ in range(RUNS)]
+        help_only = [invoke(["--help"], env) for _ in range(RUNS)]
+        for name, timings in (
+            ("--help", help_only), ("cold score", cold), ("warm score", warm)
+        ):
+            print(f"{name}: {min(timings) * 1000:.1f} ms (best of {RUNS})")
+
+
+if __name__ == "__main__":
+    main()
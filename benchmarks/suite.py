@@ -0,0 +1,171 @@
+import json
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Optional
+
+import click
+
+from benchmarks.synthetic import generate_export, manifests
+from jotform_summary.csv_mapping import Manifest, compile_manifest
+from jotform_summary.reader import open_export, read_export
+
+BASELINE = pathlib.Path("benchmarks/baseline.json")
+VALIDATIONS = 20
+
+
+def best_of(repeat: int, run: Callable[[], None]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmarks(export: pathlib.Path, manifest_dir: pathlib.Path) -> dict:
+    # name -> (units the time is divided by, callable to time)
+    with open_export(export) as f:
+        header, *submissions = list(read_export(f))
+    described = manifests()
+    compiled = {
+        name: compile_manifest(manifest) for name, manifest in described.items()
+    }
+    gottman = compiled["gottman"]
+    preloaded = []
+    for row in submissions:
+        submission = [header, list(row)]
+        gottman.preload(submission)
+        preloaded.append(submission)
+
+    def validate():
+        for _ in range(VALIDATIONS):
+            for manifest in described.values():
+                Manifest(**manifest)
+
+    def preload():
+        for row in submissions:
+            gottman.preload([header, list(row)])
+
+    def output(name):
+        # the scalar manifest has no preload, so the Gottman-preloaded rows
+        # serve both
+        plan = compiled[name].bind(header)
+
+        def run():
+            for submission in preloaded:
+                plan.evaluate(submission)
+        return run
+
+    def parse():
+        with open_export(export) as f:
+            for _ in read_export(f):
+                pass
+
+    def cli(name):
+        def run():
+            subprocess.run(
+                [
+                    sys.executable, "-m", "jotform_summary.main", "score",
+                    str(export), "--manifest", str(manifest_dir / f"{name}.json"),
+                    "--output", "/dev/null", "--no-cache",
+                ],
+                check=True,
+            )
+        return run
+
+    return {
+        "manifest_validation": (VALIDATIONS * len(described), validate),
+        "preload": (len(submissions), preload),
+        "scalar_output": (len(submissions), output("scalar")),
+        "group_output": (len(submissions), output("gottman")),
+        "csv_parsing": (len(submissions), parse),
+        "cli_gottman": (len(submissions), cli("gottman")),
+        "cli_group": (len(submissions), cli("group")),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    # names of benchmarks more than `tolerance` slower than the baseline
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = result["us_per_unit"] / previous["us_per_unit"]
+        result["baseline_ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+@click.command()
+@click.option("--submissions", type=click.IntRange(min=1), default=2000, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True)
+@click.option(
+    "--only", "selected", multiple=True, help="Run only the named benchmarks.",
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    default=None, help="Write the results as JSON here.",
+)
+@click.option(
+    "--baseline", type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    default=BASELINE, show_default=True,
+)
+@click.option(
+    "--tolerance", type=float, default=0.25, show_default=True,
+    help="Fail when a benchmark is this fraction slower than the baseline.",
+)
+@click.option("--save-baseline", is_flag=True, help="Replace the baseline.")
+def main(
+    submissions: int, seed: int, repeat: int, selected: tuple,
+    output: Optional[pathlib.Path], baseline: pathlib.Path, tolerance: float,
+    save_baseline: bool,
+):
+    """Time scoring stages over a synthetic export and check for regressions."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = pathlib.Path(tmp)
+        export = tmp_dir / "export.csv"
+        generate_export(export, submissions, seed)
+        for name, manifest in manifests().items():
+            (tmp_dir / f"{name}.json").write_text(json.dumps(manifest))
+        results = {}
+        for name, (units, run) in benchmarks(export, tmp_dir).items():
+            if selected and name not in selected:
+                continue
+            seconds = best_of(repeat, run)
+            results[name] = {
+                "seconds": round(seconds, 6),
+                "us_per_unit": round(seconds / units * 1e6, 3),
+            }
+            click.echo(f"{name}: {results[name]['us_per_unit']:.1f} us/unit")
+
+    regressions = []
+    if baseline.exists() and not save_baseline:
+        regressions = compare(
+            results, json.loads(baseline.read_text())["results"], tolerance
+        )
+    report = {
+        "submissions": submissions,
+        "seed": seed,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2) + "\n")
+    if save_baseline:
+        baseline.write_text(json.dumps(report, indent=2) + "\n")
+    if regressions:
+        raise click.ClickException(
+            f"slower than {baseline} by more than {tolerance:.0%}: "
+            + ", ".join(regressions)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import csv
+import json
+import pathlib
+import random
+from typing import TextIO
+
+FIXTURE = pathlib.Path("test_data/submission.csv")
+GOTTMAN_MANIFEST = pathlib.Path("test_data/gottman_manifest.json")
+
+# answer sets Jotform writes for the question types in the fixture; a column
+# whose fixture answers all come from one of these is sampled from all of it
+VOCABULARIES = (
+    ("True", "False"),
+    ("Is a problem", "Not a problem"),
+    ("Yes", "No"),
+    ("Female", "Male"),
+    ("Never", "Rarely", "Occasionally", "Frequently"),
+    ("Hardly ever or never", "Once a month", "Once a week", "Daily"),
+    (
+        "Always Agree", "Almost Always Agree", "Occasionally Disagree",
+        "Frequently Disagree", "Almost Always Disagree", "Always Disagree",
+    ),
+    (
+        "Strongly Disagree", "Disagree", "Neither agree nor disagree", "Agree",
+        "Strongly Agree",
+    ),
+    (
+        "1 = Strongly Disagree", "2 = Disagree", "3 = Neutral", "4 = Agree",
+        "5 = Strongly Agree",
+    ),
+)
+WORDS = (
+    "we", "talk", "about", "money", "often", "but", "it", "never", "ends",
+    "well", "my", "partner", "works", "late", "and", "the", "kids", "notice",
+    "weekends", "are", "better", "since", "we", "moved",
+)
+NAMES = ("Carl", "Wilma", "Ana", "Ravi", "June", "Tomasz", "Ife", "Mei")
+SURNAMES = ("Lambert", "Okafor", "Nguyen", "Silva", "Kowalski", "Haddad")
+
+
+def read_fixture() -> tuple[list, list[list]]:
+    with FIXTURE.open(newline="") as f:
+        header, *submissions = list(csv.reader(f))
+    return header, submissions
+
+
+def column_kinds(header: list, submissions: list[list]) -> list:
+    # per column: a vocabulary tuple, "multiline", "name", "text", or the
+    # constant string the fixture always has there
+    kinds = []
+    for col_num in range(len(header)):
+        answers = {row[col_num] for row in submissions}
+        vocabulary = next(
+            (v for v in VOCABULARIES if answers <= set(v)), None
+        )
+        if vocabulary is not None:
+            kinds.append(vocabulary)
+        elif any("\n" in answer for answer in answers):
+            kinds.append("multiline")
+        elif len(answers) == 1:
+            kinds.append(answers.pop())
+        elif header[col_num].rstrip(": ").endswith("Name"):
+            kinds.append("name")
+        else:
+            kinds.append("text")
+    return kinds
+
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(3, 12))
+    return " ".join(words).capitalize() + "."
+
+
+def cell(kind, rng: random.Random) -> str:
+    if type(kind) == tuple:
+        return rng.choice(kind)
+    if kind == "multiline":
+        return "\n".join(sentence(rng) for _ in range(rng.randint(1, 4)))
+    if kind == "name":
+        return f"{rng.choice(NAMES)} {rng.choice(SURNAMES)}"
+    if kind == "text":
+        return sentence(rng)
+    return kind
+
+
+def write_export(file: TextIO, submissions: int, seed: int = 0) -> list:
+    # writes a header and `submissions` rows shaped like the fixture export;
+    # the same seed always writes the same file
+    header, fixture_rows = read_fixture()
+    kinds = column_kinds(header, fixture_rows)
+    rng = random.Random(seed)
+    writer = csv.writer(file)
+    writer.writerow(header)
+    for _ in range(submissions):
+        writer.writerow([cell(kind, rng) for kind in kinds])
+    return header
+
+
+def generate_export(path: pathlib.Path, submissions: int, seed: int = 0) -> None:
+    with path.open("w", encoding="utf-8", newline="") as f:
+        write_export(f, submissions, seed)
+
+
+def scalar_manifest() -> dict:
+    # every vocabulary question listed with its label, as summaries print them
+    header, fixture_rows = read_fixture()
+    kinds = column_kinds(header, fixture_rows)
+    return {
+        "cargo": [
+            {
+                "load_type": "scalar",
+                "col_num": col_num,
+                "row_num": 1,
+                "label_suffix": ": ",
+                "ignore_if_empty_string": True,
+            }
+            for col_num, kind in enumerate(kinds)
+            if type(kind) == tuple and header[col_num].strip()
+        ]
+    }
+
+
+def group_manifest() -> dict:
+    # True/False runs preloaded to 0/1 and scored per run, plus a derived
+    # average, like the sectioned questionnaires in the Gottman manifest
+    kinds = column_kinds(*read_fixture())
+    runs: list[list[int]] = []
+    for col_num, kind in enumerate(kinds):
+        if kind != ("True", "False"):
+            continue
+        if runs and runs[-1][-1] == col_num - 1:
+            runs[-1].append(col_num)
+        else:
+            runs.append([col_num])
+    runs = [run for run in runs if len(run) > 1]
+    return {
+        "preload": [{
+            "col_num": {"ranges": [[run[0], run[-1]] for run in runs]},
+            "map": {"map_type": "binary", "is_one": "True"},
+        }],
+        "cargo": [
+            *(
+                {
+                    "load_type": "group",
+                    "label": f"Run {i}: ",
+                    "name": f"run_{i}",
+                    "cols": {"start": run[0], "end": run[-1]},
+                    "reduce": {"average_then_multiply_by": 100},
+                }
+                for i, run in enumerate(runs)
+            ),
+            {
+                "load_type": "derived",
+                "label": "Average: ",
+                "inputs": [f"run_{i}" for i in range(len(runs))],
+                "reduce": "average",
+            },
+        ],
+    }
+
+
+def manifests() -> dict[str, dict]:
+    with GOTTMAN_MANIFEST.open() as f:
+        gottman = json.load(f)
+    return {
+        "gottman": gottman,
+        "scalar": scalar_manifest(),
+        "group": group_manifest(),
+    }
@@ -0,0 +1,36 @@
+import csv
+import json
+import pathlib
+import time
+
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.reducers import np
+from jotform_summary.vectorized import values_iter_vectorized
+
+SUBMISSIONS = 20000
+CHUNK_SIZE = 1000
+
+
+def main():
+    with pathlib.Path("test_data/gottman_manifest.json").open() as f:
+        compiled = compile_manifest(json.load(f))
+    with pathlib.Path("test_data/submission.csv").open(newline="") as f:
+        header, *submissions = list(csv.reader(f))
+    rows = list(compiled.project(header, (
+        submissions[i % len(submissions)] for i in range(SUBMISSIONS)
+    )))
+
+    backends = ["python"] if np is None else ["python", "numpy"]
+    for backend in backends:
+        start = time.perf_counter()
+        for _ in values_iter_vectorized(
+            compiled, header, [list(row) for row in rows], projected=True,
+            backend=backend, chunk_size=CHUNK_SIZE,
+        ):
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"{backend}: {elapsed / SUBMISSIONS * 1e6:.1f} us/submission")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import math
+from typing import Optional
+
+from jotform_summary.sinks import OutputStepProtocol, unique_keys
+
+
+class RunningStats:
+    # count, mean and variance by Welford's online algorithm, min/max and a
+    # fixed-width histogram; two partial states merge exactly (Chan et al.),
+    # so workers can each summarise their own submissions
+    __slots__ = ("count", "missing", "mean", "m2", "min", "max", "bin_width", "bins")
+
+    def __init__(self, bin_width: float = 10.0):
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.bin_width = bin_width
+        self.bins: dict[int, int] = {}
+
+    def add(self, value) -> None:
+        if value is None:
+            self.missing += 1
+            return
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        bin_num = math.floor(value / self.bin_width)
+        self.bins[bin_num] = self.bins.get(bin_num, 0) + 1
+
+    def merge(self, other: "RunningStats") -> None:
+        if other.bin_width != self.bin_width:
+            raise ValueError("cannot merge histograms with different bin widths")
+        self.missing += other.missing
+        for bin_num, count in other.bins.items():
+            self.bins[bin_num] = self.bins.get(bin_num, 0) + count
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> Optional[float]:
+        # population variance of the submissions scored
+        return self.m2 / self.count if self.count else None
+
+    def dict(self) -> dict:
+        empty = self.count == 0
+        return {
+            "count": self.count,
+            "missing": self.missing,
+            "mean": None if empty else self.mean,
+            "variance": self.variance,
+            "min": None if empty else self.min,
+            "max": None if empty else self.max,
+            "histogram": [
+                {"start": bin_num * self.bin_width, "count": self.bins[bin_num]}
+                for bin_num in sorted(self.bins)
+            ],
+        }
+
+
+class CohortAggregates:
+    # a sink that keeps RunningStats for every group and derived score, so
+    # memory grows with the number of cargo items, not of submissions.
+    # Scores are named as in the other outputs, repeated labels suffixed
+    def __init__(self, bin_width: float = 10.0):
+        self.bin_width = bin_width
+        self.keys: list[str] = []
+        self.positions: list[int] = []
+        self.stats: dict[str, RunningStats] = {}
+
+    def start(self, output_steps: list[OutputStepProtocol]) -> None:
+        self.keys = []
+        self.positions = []
+        names = unique_keys(output_steps)
+        for position, output_step in enumerate(output_steps):
+            if getattr(output_step, "group", None) is None and getattr(
+                output_step, "inputs", None
+            ) is None:
+                continue
+            key = names[position]
+            self.keys.append(key)
+            self.positions.append(position)
+            if key not in self.stats:
+                self.stats[key] = RunningStats(self.bin_width)
+
+    def write(self, values: list, submission: Optional[int] = None) -> None:
+        stats = self.stats
+        for key, position in zip(self.keys, self.positions):
+            stats[key].add(values[position])
+
+    def finish(self) -> None:
+        pass
+
+    def merge(self, other: "CohortAggregates") -> None:
+        for key, stats in other.stats.items():
+            if key not in self.stats:
+                self.stats[key] = RunningStats(self.bin_width)
+            self.stats[key].merge(stats)
+
+    def dict(self) -> dict:
+        return {key: stats.dict() for key, stats in self.stats.items()}
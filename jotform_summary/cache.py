@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Union
+import hashlib
+import json
+import sqlite3
+
+from jotform_summary.cache_paths import cache_dir, code_fingerprint
+from jotform_summary.csv_mapping import CompiledManifest
+from jotform_summary.header_index import header_fingerprint
+from jotform_summary.reader import chunked
+
+# keys per SELECT, under SQLite's default limit of 999 parameters
+SELECT_BATCH = 500
+
+
+def default_cache_path() -> Path:
+    return cache_dir() / "results.sqlite"
+
+
+class ResultCache:
+    # an in-process LRU in front of an optional SQLite table; both are
+    # bounded by entry count and drop the least recently used entries first
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        memory_entries: int = 10_000,
+        max_entries: int = 1_000_000,
+        flush_every: int = 1000,
+    ):
+        self.memory: "OrderedDict[str, list]" = OrderedDict()
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self.db: Optional[sqlite3.Connection] = None
+        self._writes: list[tuple[str, str, int]] = []
+        self._touched: list[tuple[int, str]] = []
+        self._clock = 0
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(str(path))
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, used INTEGER NOT NULL)"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS results_used ON results (used)"
+            )
+            self._clock = self.db.execute(
+                "SELECT COALESCE(MAX(used), 0) FROM results"
+            ).fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get(self, key: str) -> Optional[list]:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+        if self.db is not None:
+            row = self.db.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                values = json.loads(row[0])
+                self._remember(key, values)
+                self._clock += 1
+                self._touched.append((self._clock, key))
+                self.hits += 1
+                self._maybe_flush()
+                return values
+        self.misses += 1
+        return None
+
+    def get_many(self, keys: list[str]) -> list[Optional[list]]:
+        # get() for a window of keys, with one SELECT per batch of keys that
+        # are not in memory rather than one per key
+        found = {key: self.memory[key] for key in keys if key in self.memory}
+        for key in found:
+            self.memory.move_to_end(key)
+        wanted = list(dict.fromkeys(key for key in keys if key not in found))
+        if self.db is not None and wanted:
+            for batch in chunked(wanted, SELECT_BATCH):
+                rows = self.db.execute(
+                    "SELECT key, value FROM results WHERE key IN ("
+                    + ", ".join("?" * len(batch)) + ")",
+                    batch,
+                ).fetchall()
+                for key, value in rows:
+                    values = json.loads(value)
+                    found[key] = values
+                    self._remember(key, values)
+                    self._clock += 1
+                    self._touched.append((self._clock, key))
+        results = [found.get(key) for key in keys]
+        misses = results.count(None)
+        self.hits += len(results) - misses
+        self.misses += misses
+        self._maybe_flush()
+        return results
+
+    def put(self, key: str, values: list) -> None:
+        self._remember(key, values)
+        if self.db is not None:
+            self._clock += 1
+            self._writes.append((key, json.dumps(values), self._clock))
+            self._maybe_flush()
+
+    def _remember(self, key: str, values: list) -> None:
+        self.memory[key] = values
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _maybe_flush(self) -> None:
+        if len(self._writes) + len(self._touched) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.db is None:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO results (key, value, used) VALUES (?, ?, ?)",
+                self._writes,
+            )
+            self.db.executemany(
+                "UPDATE results SET used = ? WHERE key = ?", self._touched
+            )
+            count = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if count > self.max_entries:
+                self.db.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+        self._writes = []
+        self._touched = []
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
+
+
+def cache_key_prefix(compiled: CompiledManifest, header_row: list):
+    digest = hashlib.sha256(compiled.fingerprint.encode("utf-8"))
+    digest.update(header_fingerprint(header_row).encode("utf-8"))
+    digest.update(code_fingerprint().encode("utf-8"))
+    return digest
+
+
+def cached_values_iter(
+    compiled: CompiledManifest,
+    header_row: list,
+    rows: Iterable[list],
+    cache: ResultCache,
+    compute: Callable[[list[list]], Iterable[list]],
+    projected: bool = False,
+    window_size: int = 1000,
+) -> Iterator[list]:
+    # rows are keyed by the cells the manifest references, so edits to other
+    # columns still hit; compute scores the misses of each window in order
+    prefix = cache_key_prefix(compiled, header_row)
+    columns = None if projected else tuple(compiled.columns(header_row))
+    for window in chunked(rows, window_size):
+        keys = []
+        for row in window:
+            cells = row if columns is None else [row[col] for col in columns]
+            digest = prefix.copy()
+            digest.update("\x1f".join(map(str, cells)).encode("utf-8"))
+            keys.append(digest.hexdigest())
+        found = cache.get_many(keys)
+        misses = [row for row, cached in zip(window, found) if cached is None]
+        computed = iter(compute(misses) if misses else ())
+        for key, cached in zip(keys, found):
+            if cached is None:
+                cached = next(computed)
+                cache.put(key, cached)
+            yield cached
@@ -0,0 +1,22 @@
+from functools import lru_cache
+from pathlib import Path
+import hashlib
+import os
+
+PACKAGE_DIR = Path(__file__).parent
+
+
+def cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "jotform-summary"
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    # the package's own source, so nothing cached by a different version of
+    # the scoring code (an upgrade or a local edit) is reused
+    digest = hashlib.sha256()
+    for path in sorted(PACKAGE_DIR.glob("*.py")):
+        digest.update(path.name.encode("utf-8") + b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
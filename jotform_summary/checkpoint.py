@@ -0,0 +1,157 @@
+from itertools import count, dropwhile
+from pathlib import Path
+from typing import IO, Iterator, Optional
+import csv
+import hashlib
+import io
+import os
+
+from pydantic import BaseModel, ValidationError
+
+from jotform_summary.csv_mapping import CompiledManifest
+from jotform_summary.header_index import header_fingerprint
+from jotform_summary.pipeline import score_rows
+from jotform_summary.sinks import Sink
+
+TAIL_BYTES = 4096
+
+
+class Checkpoint(BaseModel):
+    # offset is where the next unscored submission starts; tail_hash covers
+    # the bytes just before it so a rewritten export is not resumed.
+    # output_size is how long the output file was when the run finished
+    offset: int
+    row_count: int
+    fingerprint: str
+    tail_hash: str
+    output_size: Optional[int] = None
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["Checkpoint"]:
+        if not path.exists():
+            return None
+        try:
+            return cls.parse_file(path)
+        except (ValidationError, ValueError):
+            return None
+
+    def save(self, path: Path) -> None:
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(self.json())
+        os.replace(tmp_path, path)
+
+
+def run_fingerprint(header_row: list, compiled: CompiledManifest) -> str:
+    digest = hashlib.sha256(header_fingerprint(header_row).encode("utf-8"))
+    digest.update(compiled.fingerprint.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def tail_hash(export_file, offset: int) -> str:
+    start = max(0, offset - TAIL_BYTES)
+    export_file.seek(start)
+    return hashlib.sha256(export_file.read(offset - start)).hexdigest()
+
+
+class IncrementalRun:
+    # scores only the submissions appended since the checkpoint was written;
+    # a changed header, manifest or already-scored prefix rescores everything.
+    # When the output is a file, output_path lets a resumed run cut off what
+    # a failed run appended after the checkpoint, and rescores everything if
+    # the file is shorter than the checkpoint recorded
+    def __init__(
+        self,
+        compiled: CompiledManifest,
+        export_path: Path,
+        checkpoint_path: Path,
+        output_path: Optional[Path] = None,
+    ):
+        self.compiled = compiled
+        self.export_path = Path(export_path)
+        self.checkpoint_path = Path(checkpoint_path)
+        self.output_path = None if output_path is None else Path(output_path)
+        with self.export_path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+            self.header_row = next(csv.reader(text), None)
+            text.detach()
+            self.fingerprint = (
+                None if self.header_row is None
+                else run_fingerprint(self.header_row, compiled)
+            )
+            checkpoint = Checkpoint.load(self.checkpoint_path)
+            self.resumed = (
+                checkpoint is not None
+                and checkpoint.fingerprint == self.fingerprint
+                and 0 < checkpoint.offset <= size
+                and checkpoint.tail_hash == tail_hash(f, checkpoint.offset)
+                and self.output_fits(checkpoint)
+            )
+        self.output_start = 0
+        if (
+            self.resumed and self.output_path is not None
+            and checkpoint.output_size is not None
+        ):
+            self.output_start = checkpoint.output_size
+            os.truncate(self.output_path, self.output_start)
+        self.start_offset = checkpoint.offset if self.resumed else 0
+        self.previous_rows = checkpoint.row_count if self.resumed else 0
+        self.end_offset = self.start_offset
+        self.rows_read = 0
+
+    def output_fits(self, checkpoint: Checkpoint) -> bool:
+        if self.output_path is None or checkpoint.output_size is None:
+            return True
+        try:
+            return self.output_path.stat().st_size >= checkpoint.output_size
+        except FileNotFoundError:
+            return False
+
+    def rows(self) -> Iterator[list]:
+        # yields the header row first, then the submissions to score
+        with self.export_path.open("rb") as f:
+            f.seek(self.start_offset)
+            encoding = "utf-8" if self.resumed else "utf-8-sig"
+            text = io.TextIOWrapper(f, encoding=encoding, newline="")
+            reader = csv.reader(text)
+            if self.resumed:
+                # an export without a trailing newline is checkpointed at its
+                # end, so what was appended since starts with that line break
+                reader = dropwhile(lambda row: not row, reader)
+            else:
+                next(reader, None)
+            yield self.header_row
+            for row in reader:
+                self.rows_read += 1
+                yield row
+            self.end_offset = text.buffer.tell()
+
+    def run(self, sink: Sink, output: Optional[IO] = None, **score_options) -> int:
+        # output is the open file at output_path that sink writes to; a failed
+        # run truncates it back to where this run started
+        if self.header_row is None:
+            return 0
+        try:
+            scored = score_rows(
+                self.compiled, self.rows(), sink,
+                submission_numbers=count(self.previous_rows), **score_options
+            )
+        except BaseException:
+            if output is not None:
+                output.flush()
+                os.truncate(output.fileno(), self.output_start)
+            raise
+        output_size = None
+        if output is not None:
+            output.flush()
+            output_size = os.fstat(output.fileno()).st_size
+        with self.export_path.open("rb") as f:
+            checkpoint = Checkpoint(
+                offset=self.end_offset,
+                row_count=self.previous_rows + self.rows_read,
+                fingerprint=self.fingerprint,
+                tail_hash=tail_hash(f, self.end_offset),
+                output_size=output_size,
+            )
+        checkpoint.save(self.checkpoint_path)
+        return scored
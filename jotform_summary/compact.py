@@ -0,0 +1,124 @@
+from array import array
+from typing import Callable, Iterable, Iterator, Optional
+
+from jotform_summary.csv_mapping import (
+    UNMAPPED, CompiledManifest, PreloadDescription, column_position
+)
+from jotform_summary.header_index import HeaderIndex
+
+
+class StringDictionary:
+    # one code per distinct cell string seen in an export
+    def __init__(self):
+        self.codes: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def __len__(self):
+        return len(self.strings)
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def encode_row(self, row: Iterable[str]) -> array:
+        return array("I", map(self.encode, row))
+
+    def decode_row(self, codes: array) -> list[str]:
+        return list(map(self.strings.__getitem__, codes))
+
+
+class CompactRows:
+    # submission rows stored as arrays of dictionary codes
+    def __init__(self, dictionary: Optional[StringDictionary] = None):
+        self.dictionary = StringDictionary() if dictionary is None else dictionary
+        self.rows: list[array] = []
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[list[str]]) -> "CompactRows":
+        compact_rows = cls()
+        for row in rows:
+            compact_rows.append(row)
+        return compact_rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[array]:
+        return iter(self.rows)
+
+    def __getitem__(self, row_num: int) -> array:
+        return self.rows[row_num]
+
+    def append(self, row: Iterable[str]) -> None:
+        self.rows.append(self.dictionary.encode_row(row))
+
+    def decode(self, row_num: int) -> list[str]:
+        return self.dictionary.decode_row(self.rows[row_num])
+
+
+def compile_table_preload(
+    preloader: PreloadDescription,
+    index: HeaderIndex,
+    dictionary: StringDictionary,
+) -> Callable[[list, array], None]:
+    # the map is applied once per distinct string, after that preloading a
+    # cell is a list lookup by its code
+    positions = tuple(
+        column_position(col_num, index)
+        for col_num in preloader.resolve_columns(index)
+    )
+    mapping = preloader.map
+    strings = dictionary.strings
+    table: list = []
+
+    def preload(row, codes):
+        if len(table) < len(strings):
+            table.extend(mapping.lookup_table(strings[len(table):]))
+        for col_num in positions:
+            value = table[codes[col_num]]
+            if value is UNMAPPED:
+                mapping.get(strings[codes[col_num]])
+            row[col_num] = value
+
+    return preload
+
+
+def compact_values_iter(
+    compiled: CompiledManifest,
+    header_row: list,
+    compact_rows: CompactRows,
+    projected: bool = False,
+) -> Iterator[list]:
+    # same results as compiled.values_iter over the decoded rows
+    plan = compiled.bind(header_row, projected)
+    if projected:
+        header_row = [header_row[col_num] for col_num in plan.index.columns]
+    dictionary = compact_rows.dictionary
+    # preloads of the submission row read their input straight from the codes
+    # unless an earlier preload already rewrote one of their columns
+    preload_steps = []
+    touched: set[int] = set()
+    for preloader, preload_step in zip(compiled.manifest.preload, plan.preload_steps):
+        columns = set(preloader.resolve_columns(plan.index))
+        if preloader.row_num == 1 and not columns & touched:
+            preload_steps.append(
+                (True, compile_table_preload(preloader, plan.index, dictionary))
+            )
+        else:
+            preload_steps.append((False, preload_step))
+        if preloader.row_num == 1:
+            touched |= columns
+    evaluate = plan.evaluate
+    decode_row = dictionary.decode_row
+    for codes in compact_rows:
+        row = decode_row(codes)
+        submission = [header_row, row]
+        for from_codes, preload_step in preload_steps:
+            if from_codes:
+                preload_step(row, codes)
+            else:
+                preload_step(submission)
+        yield evaluate(submission)
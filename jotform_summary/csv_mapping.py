@@ -1,12 +1,70 @@
-from pydantic import BaseModel, Field, conlist
-from typing import Union, Literal, Optional, Protocol, Dict, Iterator
+from pydantic import BaseModel, Field, conlist, root_validator, validator
+from typing import (
+    Any, Iterable, Union, Literal, Optional, Protocol, Dict, Iterator, Callable, NamedTuple
+)
 from typing_extensions import Annotated
-from functools import reduce
+import hashlib
+import json
+from jotform_summary.header_index import (
+    ColumnResolutionException, HeaderIndex, ProjectedHeaderIndex,
+    header_fingerprint, header_index
+)
+from jotform_summary.reducers import REDUCERS, Reducer, scaled, weighted_sum
+from jotform_summary.sinks import Sink, StringSink
+
 
 class Prefixing(BaseModel):
     starts_with: str
 
 
+# a column is given by number, by exact header name or by header prefix
+ColumnReference = Union[int, Prefixing, str]
+
+
+def resolve_column(
+    column: ColumnReference, index: Optional[HeaderIndex] = None
+) -> int:
+    if type(column) == int:
+        return column
+    if index is None:
+        raise ColumnResolutionException(f"{column!r} needs a header row")
+    if type(column) == Prefixing:
+        return index.find_prefix(column.starts_with)
+    return index.find_name(column)
+
+
+def column_position(col_num: int, index: Optional[HeaderIndex] = None) -> int:
+    return col_num if index is None else index.position(col_num)
+
+
+class GroupPlan(NamedTuple):
+    row_num: int
+    positions: tuple[int, ...]
+    reducer: Reducer
+
+
+class OutputStep(NamedTuple):
+    # key names the cargo item in structured sinks, prefix is the label text
+    # written before the value; value(rows) returns None when nothing is output.
+    # group is set for group reductions so they can be run over many rows at once.
+    # Derived steps have inputs (indices of other steps) and value(input_values)
+    key: str
+    prefix: str
+    value: Callable[[list], Any]
+    group: Optional[GroupPlan] = None
+    inputs: Optional[tuple[int, ...]] = None
+
+    def render(self, rows) -> str:
+        value = self.value(rows)
+        if value is None:
+            return ""
+        return self.prefix + str(value) + "\n"
+
+
+def label_key(label: str) -> str:
+    return label.strip().rstrip(":").strip()
+
+
 class StringMapping(BaseModel):
     map_type: Literal["static_string"]
     output: str
@@ -20,10 +78,15 @@ class BinaryMapping(BaseModel):
 
     def get(self, key):
         return int(key == self.is_one)
+
+    def lookup_table(self, keys: list) -> list:
+        return [int(key == self.is_one) for key in keys]
         
 class RangeMappingException(Exception):
     pass
 
+UNMAPPED = object()
+
 class RangeMapping(BaseModel):
     map_type: Literal["range"]
     range_map: Dict[str, int]
@@ -33,13 +96,17 @@ class RangeMapping(BaseModel):
             raise RangeMappingException(f"{key} not in range_map: {self.range_map}")
         return self.range_map[key]
 
+    def lookup_table(self, keys: list) -> list:
+        # keys outside range_map map to UNMAPPED so the lookup can raise later
+        return [self.range_map.get(key, UNMAPPED) for key in keys]
+
 
 class ScalarLoadingDescriptionException(Exception):
     pass
 
 class ScalarLoadingDescription(BaseModel):
     load_type: Literal["scalar"]
-    col_num: int
+    col_num: ColumnReference
     label: Optional[
         Union[
             Literal["from_col"],
@@ -48,6 +115,8 @@ class ScalarLoadingDescription(BaseModel):
     ] = None
     label_suffix: str = ""
     row_num: int
+    name: Optional[str] = None
+    hidden: bool = False
     ignore_if_empty_string: bool = False
     map: Optional[Union[
         StringMapping,
@@ -55,66 +124,139 @@ class ScalarLoadingDescription(BaseModel):
     ]] = None
 
     def output(self, rows):
-        if self.ignore_if_empty_string:
-            val = rows[self.row_num][self.col_num]
-            if val == "":
-                return val
-        header_row = rows[0]
-        out = ""
+        return self.compile(rows[0]).render(rows)
+
+    def compile(
+        self, header_row: list, index: Optional[HeaderIndex] = None
+    ) -> OutputStep:
+        if index is None:
+            index = header_index(header_row)
+        row_num = self.row_num
+        header_col_num = resolve_column(self.col_num, index)
+        col_num = column_position(header_col_num, index)
+        key = label_key(header_row[header_col_num])
         if self.map is None:
-            return header_row[self.col_num] + self.label_suffix + "\n"
+            prefix = header_row[header_col_num] + self.label_suffix
+            out = ""
         elif type(self.map) == StringMapping:
-            out += self.map.output
+            if self.label is None:
+                prefix = ""
+            else:
+                prefix = self.label + self.label_suffix
+                key = label_key(self.label)
+            out = self.map.output
         else:
-            raise ScalarLoadingDescriptionException("Could not map")
-        
-        if self.label is None:
-            return out + "\n"
-        
-        if self.label_suffix is not None:
-            return self.label + self.label_suffix + out + "\n"
+            prefix = ""
+            out = None
+
+        def value(rows):
+            if self.ignore_if_empty_string and rows[row_num][col_num] == "":
+                return None
+            if out is None:
+                raise ScalarLoadingDescriptionException("Could not map")
+            return out
+
+        return OutputStep(self.name or key, prefix, value)
+
+    def referenced_columns(
+        self, index: Optional[HeaderIndex] = None
+    ) -> Iterator[int]:
+        yield resolve_column(self.col_num, index)
 
 
 class PreloadRangesAndOneOffs(BaseModel):
-    ranges: list[Union[int, conlist(int, min_items=2, max_items=2)]]
+    ranges: list[Union[
+        ColumnReference,
+        conlist(ColumnReference, min_items=2, max_items=2)
+    ]]
 
-    def generate_columns(self):
+    def generate_columns(self, index: Optional[HeaderIndex] = None):
         for range_or_oneoff in self.ranges:
             if type(range_or_oneoff) == list:
-                for i in range(range_or_oneoff[0], range_or_oneoff[1] + 1):
+                start = resolve_column(range_or_oneoff[0], index)
+                end = resolve_column(range_or_oneoff[1], index)
+                for i in range(start, end + 1):
                     yield i
             else:
-                yield range_or_oneoff
+                yield resolve_column(range_or_oneoff, index)
 
 
 class PreloadDescription(BaseModel):
-    col_num: Union[PreloadRangesAndOneOffs, int]
+    col_num: Union[PreloadRangesAndOneOffs, ColumnReference]
     row_num: int = 1
     map: Union[BinaryMapping, RangeMapping]
 
     def preload(self, rows):
-        for col_num in self.columns:
-            key = rows[self.row_num][col_num]
-            value = self.map.get(key)
-            rows[self.row_num][col_num] = value
+        self.compile(rows[0])(rows)
+
+    def compile(
+        self, header_row: list, index: Optional[HeaderIndex] = None
+    ) -> Callable[[list], None]:
+        if index is None:
+            index = header_index(header_row)
+        row_num = self.row_num
+        columns = tuple(
+            column_position(col_num, index)
+            for col_num in self.resolve_columns(index)
+        )
+        get = self.map.get
+
+        def preload(rows):
+            row = rows[row_num]
+            for col_num in columns:
+                row[col_num] = get(row[col_num])
+
+        return preload
     
     @property
     def columns(self) -> Union[list[int], Iterator[int]]:
-        if type(self.col_num) == int:
-            return [self.col_num]
+        return self.resolve_columns()
+
+    def resolve_columns(
+        self, index: Optional[HeaderIndex] = None
+    ) -> Union[list[int], Iterator[int]]:
+        if type(self.col_num) == PreloadRangesAndOneOffs:
+            return self.col_num.generate_columns(index)
         else:
-            return self.col_num.generate_columns()
+            return [resolve_column(self.col_num, index)]
+
+    def referenced_columns(
+        self, index: Optional[HeaderIndex] = None
+    ) -> Iterator[int]:
+        yield from self.resolve_columns(index)
 
 class ColumnRange(BaseModel):
-    start: int
-    end: int
+    start: ColumnReference
+    end: ColumnReference
 
 class ReduceSumThenMultiplyBy(BaseModel):
     sum_then_multiply_by: int
 
+    def reducer(self) -> Reducer:
+        return scaled(REDUCERS["sum"], self.sum_then_multiply_by)
+
 class ReduceAverageThenMultiplyBy(BaseModel):
     average_then_multiply_by: int
 
+    def reducer(self) -> Reducer:
+        return scaled(REDUCERS["average"], self.average_then_multiply_by)
+
+class ReduceWeightedSum(BaseModel):
+    weighted_sum: list[float]
+
+    def reducer(self) -> Reducer:
+        return weighted_sum(self.weighted_sum)
+
+def check_reducer(reduce):
+    if type(reduce) == str and reduce not in REDUCERS:
+        raise ValueError(f"unknown reducer {reduce!r}")
+    return reduce
+
+def resolve_reducer(reduce) -> Reducer:
+    if type(reduce) == str:
+        return REDUCERS[reduce]
+    return reduce.reducer()
+
 class GroupLoadingDescription(BaseModel):
     load_type: Literal["group"]
     label: Union[
@@ -123,55 +265,412 @@ class GroupLoadingDescription(BaseModel):
     ]
     label_suffix: str = ""
     row_num: int = 1
-    cols: Union[list[int], ColumnRange]
+    name: Optional[str] = None
+    hidden: bool = False
+    cols: Union[list[ColumnReference], ColumnRange]
     reduce: Union[
-        Literal["sum"],
-        Literal["average"],
-        Literal["multiple"],
         ReduceSumThenMultiplyBy,
-        ReduceAverageThenMultiplyBy
+        ReduceAverageThenMultiplyBy,
+        ReduceWeightedSum,
+        str
     ]
 
-    def output(self, rows):
-        group = self.get_group(rows)
-        reduction = 0.0
-        if self.reduce == 'sum':
-            reduction = reduce(lambda x, y: float(x) + y, group)
-        elif self.reduce == 'multiple':
-            reduction = reduce(lambda x, y: float(x) * y, group)
-        elif self.reduce == 'average':
-            reduction = reduce(lambda x, y: float(x) + y, group) / len(group)
-        elif type(self.reduce) == ReduceSumThenMultiplyBy:
-            reduction = reduce(lambda x, y: float(x) + y, group)
-            reduction *= self.reduce.sum_then_multiply_by
-        elif type(self.reduce) == ReduceAverageThenMultiplyBy:
-            reduction = reduce(lambda x, y: float(x) + y, group) / len(group)
-            reduction *= self.reduce.average_then_multiply_by
-
-        return self.label + self.label_suffix + str(reduction) + "\n"
+    @validator("reduce")
+    def reducer_is_registered(cls, reduce):
+        return check_reducer(reduce)
 
-    def get_group(self, rows):
+    def output(self, rows):
+        return self.compile(rows[0]).render(rows)
+
+    def compile(
+        self, header_row: list, index: Optional[HeaderIndex] = None
+    ) -> OutputStep:
+        if index is None:
+            index = header_index(header_row)
+        if type(self.label) == ColumnNumber:
+            label = header_row[self.label.col_num]
+        else:
+            label = self.label
+        reducer = self.reducer()
+        reduce_group = reducer.python
+        get_group = self.group_getter(index)
+        row_num = self.row_num
+
+        def value(rows):
+            return reduce_group(get_group(rows[row_num]))
+
+        return OutputStep(
+            self.name or label_key(label),
+            label + self.label_suffix,
+            value,
+            GroupPlan(row_num, self.group_positions(index), reducer),
+        )
+
+    def reducer(self) -> Reducer:
+        return resolve_reducer(self.reduce)
+
+    def group_getter(
+        self, index: Optional[HeaderIndex] = None
+    ) -> Callable[[list], list]:
         if type(self.cols) == ColumnRange:
-            start = self.cols.start
-            end = self.cols.end + 1
-            return rows[self.row_num][start:end]
+            # a projection keeps every column of a range, so it stays contiguous
+            start = column_position(resolve_column(self.cols.start, index), index)
+            end = column_position(resolve_column(self.cols.end, index), index) + 1
+            return lambda row: row[start:end]
         # else it is a non-contiguous group
-        return [
-            rows[self.row_num][col] for col in self.cols
-        ]
+        cols = tuple(
+            column_position(resolve_column(col, index), index)
+            for col in self.cols
+        )
+        return lambda row: [row[col] for col in cols]
+
+    def group_positions(
+        self, index: Optional[HeaderIndex] = None
+    ) -> tuple[int, ...]:
+        return tuple(
+            column_position(col_num, index)
+            for col_num in self.referenced_columns(index)
+        )
+
+    def referenced_columns(
+        self, index: Optional[HeaderIndex] = None
+    ) -> Iterator[int]:
+        if type(self.cols) == ColumnRange:
+            start = resolve_column(self.cols.start, index)
+            end = resolve_column(self.cols.end, index)
+            yield from range(start, end + 1)
+        else:
+            for col in self.cols:
+                yield resolve_column(col, index)
+
+    def get_group(self, rows):
+        return self.group_getter(header_index(rows[0]))(rows[self.row_num])
+
+class DerivedLoadingDescription(BaseModel):
+    # reduces the values of other named cargo entries instead of row cells
+    load_type: Literal["derived"]
+    label: str
+    label_suffix: str = ""
+    name: Optional[str] = None
+    hidden: bool = False
+    inputs: conlist(str, min_items=1)
+    reduce: Union[
+        ReduceSumThenMultiplyBy,
+        ReduceAverageThenMultiplyBy,
+        ReduceWeightedSum,
+        str
+    ]
+
+    @validator("reduce")
+    def reducer_is_registered(cls, reduce):
+        return check_reducer(reduce)
+
+    def compile(
+        self, header_row: list, index: Optional[HeaderIndex] = None
+    ) -> OutputStep:
+        # CompiledManifest fills in inputs once names are resolved
+        return OutputStep(
+            self.name or label_key(self.label),
+            self.label + self.label_suffix,
+            resolve_reducer(self.reduce).python,
+        )
+
+    def referenced_columns(
+        self, index: Optional[HeaderIndex] = None
+    ) -> Iterator[int]:
+        return iter(())
 
 LoadingDescription = Annotated[
     Union[
         ScalarLoadingDescription, 
-        GroupLoadingDescription
+        GroupLoadingDescription,
+        DerivedLoadingDescription
     ], 
     Field(discriminator='load_type')
 ]
 
+class ManifestGraphException(Exception):
+    pass
+
 class Manifest(BaseModel):
     cargo: list[LoadingDescription]
     preload: list[PreloadDescription] = []
 
+    @root_validator(skip_on_failure=True)
+    def derived_inputs_form_a_dag(cls, values):
+        names = {}
+        for i, loading_description in enumerate(values["cargo"]):
+            if loading_description.name is None:
+                continue
+            if loading_description.name in names:
+                raise ValueError(
+                    f"cargo name {loading_description.name!r} is used twice"
+                )
+            names[loading_description.name] = i
+        for loading_description in values["cargo"]:
+            for name in getattr(loading_description, "inputs", ()):
+                if name not in names:
+                    raise ValueError(f"derived input {name!r} is not a cargo name")
+        cargo_order(values["cargo"], names, range(len(values["cargo"])))
+        return values
+
+    def names(self) -> Dict[str, int]:
+        return {
+            loading_description.name: i
+            for i, loading_description in enumerate(self.cargo)
+            if loading_description.name is not None
+        }
+
+    def compile(self, only: Optional[Iterable[str]] = None) -> "CompiledManifest":
+        return CompiledManifest(self, only)
+
+
+def cargo_order(cargo: list, names: Dict[str, int], targets) -> list[int]:
+    # cargo indices needed for targets, each after the entries it reads
+    order: list[int] = []
+    state: Dict[int, str] = {}
+
+    def visit(i):
+        if state.get(i) == "done":
+            return
+        if state.get(i) == "visiting":
+            raise ValueError(f"derived inputs of {cargo[i].label!r} form a cycle")
+        state[i] = "visiting"
+        for name in getattr(cargo[i], "inputs", ()):
+            visit(names[name])
+        state[i] = "done"
+        order.append(i)
+
+    for i in targets:
+        visit(i)
+    return order
+
+
+class Plan(NamedTuple):
+    preload_steps: list[Callable[[list], None]]
+    output_steps: list[OutputStep]
+    index: HeaderIndex
+    # every cargo step, the ones to evaluate in dependency order, and the
+    # ones that are output; output_steps == [steps[i] for i in visible].
+    # direct is set when every step is output and none is derived
+    steps: list[OutputStep]
+    order: list[int]
+    visible: list[int]
+    direct: bool
+
+    def evaluate(self, submission: list) -> list:
+        # each needed step is computed once per submission; derived steps read
+        # the memoized values of their inputs
+        steps = self.steps
+        if self.direct:
+            return [step.value(submission) for step in steps]
+        values = [None] * len(steps)
+        for i in self.order:
+            step = steps[i]
+            if step.inputs is None:
+                values[i] = step.value(submission)
+            else:
+                inputs = [values[j] for j in step.inputs]
+                if not any(value is None for value in inputs):
+                    values[i] = step.value(inputs)
+        return [values[i] for i in self.visible]
+
+
+class CompiledManifest:
+    # validation and descriptor dispatch happen once here; column references
+    # and header labels are resolved once per distinct header (keyed by its
+    # fingerprint), so scoring a submission is plain integer indexing.
+    # A projected plan indexes rows that only keep the referenced columns.
+    def __init__(self, manifest: Manifest, only: Optional[Iterable[str]] = None):
+        self.manifest = manifest
+        self.only = None if only is None else sorted(set(only))
+        self.names = manifest.names()
+        self.visible = self._visible_cargo()
+        self.order = cargo_order(manifest.cargo, self.names, self.visible)
+        self._plans: Dict[tuple, Plan] = {}
+        self._bound: tuple = (None, None)
+        self._plan: Optional[Plan] = None
+        self._fingerprint: Optional[str] = None
+
+    def __getstate__(self) -> dict:
+        # bound plans hold closures; they are rebuilt on first use
+        state = dict(self.__dict__)
+        state.update(_plans={}, _bound=(None, None), _plan=None)
+        return state
+
+    @property
+    def cargo(self) -> list:
+        return self.manifest.cargo
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            described = self.manifest.dict()
+            if self.only is not None:
+                described = {"manifest": described, "only": self.only}
+            canonical = json.dumps(described, sort_keys=True)
+            self._fingerprint = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        return self._fingerprint
+
+    def _visible_cargo(self) -> list[int]:
+        cargo = self.manifest.cargo
+        if self.only is None:
+            return [i for i, entry in enumerate(cargo) if not entry.hidden]
+        identifiers = {}
+        for i, entry in enumerate(cargo):
+            if entry.name is not None:
+                identifiers[entry.name] = i
+            if type(entry.label) == str:
+                identifiers.setdefault(label_key(entry.label), i)
+        unknown = [label for label in self.only if label not in identifiers]
+        if unknown:
+            raise ManifestGraphException(f"no cargo entries named {unknown}")
+        return sorted({identifiers[label] for label in self.only})
+
+    @property
+    def descriptors(self) -> list:
+        return [
+            *self.manifest.preload,
+            *(self.manifest.cargo[i] for i in self.order),
+        ]
+
+    def columns(self, header_row: list) -> list[int]:
+        index = header_index(header_row)
+        return sorted({
+            col_num
+            for descriptor in self.descriptors
+            for col_num in descriptor.referenced_columns(index)
+        })
+
+    def bind(self, header_row: list, projected: bool = False) -> Plan:
+        bound_header, bound_projected = self._bound
+        if bound_projected == projected and (
+            header_row is bound_header or header_row == bound_header
+        ):
+            return self._plan
+        key = (header_fingerprint(header_row), projected)
+        if key not in self._plans:
+            index = header_index(header_row, key[0])
+            if projected:
+                index = ProjectedHeaderIndex(header_row, self.columns(header_row))
+            steps = [None] * len(self.manifest.cargo)
+            for i in self.order:
+                loading_description = self.manifest.cargo[i]
+                step = loading_description.compile(header_row, index)
+                if type(loading_description) == DerivedLoadingDescription:
+                    step = step._replace(inputs=tuple(
+                        self.names[name] for name in loading_description.inputs
+                    ))
+                steps[i] = step
+            self._plans[key] = Plan(
+                [
+                    preloader.compile(header_row, index)
+                    for preloader in self.manifest.preload
+                ],
+                [steps[i] for i in self.visible],
+                index,
+                steps,
+                self.order,
+                self.visible,
+                len(self.visible) == len(steps) and all(
+                    step.inputs is None for step in steps
+                ),
+            )
+        self._bound = (list(header_row), projected)
+        self._plan = self._plans[key]
+        return self._plan
+
+    def preload_steps(
+        self, header_row: list, projected: bool = False
+    ) -> list[Callable[[list], None]]:
+        return self.bind(header_row, projected).preload_steps
+
+    def output_steps(
+        self, header_row: list, projected: bool = False
+    ) -> list[OutputStep]:
+        return self.bind(header_row, projected).output_steps
+
+    def project(self, header_row: list, rows: Iterable[list]) -> Iterator[list]:
+        return project_rows(rows, self.columns(header_row))
+
+    def preload(self, rows: list) -> None:
+        for preload_step in self.preload_steps(rows[0]):
+            preload_step(rows)
+
+    def values(self, rows: list) -> list:
+        self.preload(rows)
+        return self.bind(rows[0]).evaluate(rows)
+
+    def score(self, rows: list) -> str:
+        return render_text(self.output_steps(rows[0]), self.values(rows))
+
+    def values_iter(
+        self, header_row: list, rows, projected: bool = False
+    ) -> Iterator[list]:
+        # each submission row is scored as if it were rows[1] under header_row;
+        # projected rows come from project() and are scored the same way.
+        # Preloading rewrites cells, so it works on a copy of each row
+        plan = self.bind(header_row, projected)
+        preload_steps = plan.preload_steps
+        evaluate = plan.evaluate
+        if projected:
+            header_row = [header_row[col_num] for col_num in plan.index.columns]
+        for row in rows:
+            submission = [header_row, list(row)]
+            for preload_step in preload_steps:
+                preload_step(submission)
+            yield evaluate(submission)
+
+    def score_iter(self, header_row: list, rows) -> Iterator[str]:
+        output_steps = self.output_steps(header_row)
+        for values in self.values_iter(header_row, rows):
+            yield render_text(output_steps, values)
+
+    def score_batch(self, header_row: list, rows) -> list[str]:
+        return list(self.score_iter(header_row, rows))
+
+    def write(self, header_row: list, rows, sink: Sink) -> None:
+        sink.start(self.output_steps(header_row))
+        for values in self.values_iter(header_row, rows):
+            sink.write(values)
+        sink.finish()
+
+
+def project_rows(rows: Iterable[list], columns: list[int]) -> Iterator[list]:
+    # keep only `columns` of each row so the other cells can be freed at once
+    columns = tuple(columns)
+    for row in rows:
+        yield [row[col_num] for col_num in columns]
+
+
+def render_text(output_steps: list[OutputStep], values: list) -> str:
+    return "".join(
+        output_step.prefix + str(value) + "\n"
+        for output_step, value in zip(output_steps, values)
+        if value is not None
+    )
+
+
+def score_batch(
+    manifest: Union[dict, Manifest, CompiledManifest],
+    header_row: list,
+    rows
+) -> list[str]:
+    return compile_manifest(manifest).score_batch(header_row, rows)
+
+
+def compile_manifest(
+    manifest: Union[dict, Manifest, CompiledManifest],
+    only: Optional[Iterable[str]] = None
+) -> CompiledManifest:
+    if isinstance(manifest, CompiledManifest):
+        if only is None:
+            return manifest
+        manifest = manifest.manifest
+    if isinstance(manifest, Manifest):
+        return manifest.compile(only)
+    return Manifest(**manifest).compile(only)
+
 class LoaderException(Exception):
     pass
 
@@ -185,22 +684,32 @@ class PreloadProtocol(Protocol):
         ...
 
 class Loader:
-    def __init__(self, manifest: dict, rows: list):
-        manifest = Manifest(**manifest)
-        self.cargo: list[DataMapperProtocol] = manifest.cargo
-        self.preload_descriptions: list[PreloadProtocol] = manifest.preload
+    def __init__(
+        self,
+        manifest: Union[dict, Manifest, CompiledManifest],
+        rows: list,
+        sink: Optional[Sink] = None
+    ):
+        self.compiled = compile_manifest(manifest)
+        self.cargo: list[DataMapperProtocol] = self.compiled.cargo
+        self.preload_descriptions: list[PreloadProtocol] = (
+            self.compiled.manifest.preload
+        )
         self.rows = rows
-        self._output = ""
+        self.sink = StringSink() if sink is None else sink
         self.preload()
         self.map_rows_to_output()
 
     def get_string(self):
-        return self._output
+        if not isinstance(self.sink, StringSink):
+            raise LoaderException("get_string() needs the default string sink")
+        return self.sink.getvalue()
     
     def preload(self):
-        for preloader in self.preload_descriptions:
-            preloader.preload(self.rows)
+        self.compiled.preload(self.rows)
 
     def map_rows_to_output(self):
-        for loading_description in self.cargo:
-            self._output += loading_description.output(self.rows)
+        plan = self.compiled.bind(self.rows[0])
+        self.sink.start(plan.output_steps)
+        self.sink.write(plan.evaluate(self.rows))
+        self.sink.finish()
@@ -0,0 +1,80 @@
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Sequence
+import hashlib
+
+
+class ColumnResolutionException(Exception):
+    pass
+
+
+def header_fingerprint(header_row: Sequence) -> str:
+    digest = hashlib.sha256()
+    for name in header_row:
+        digest.update(str(name).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class HeaderIndex:
+    def __init__(self, header_row: Sequence):
+        self.header_row = list(header_row)
+        self.names: dict[str, int] = {}
+        for col_num, name in enumerate(self.header_row):
+            self.names.setdefault(str(name), col_num)
+        # sorted names let a prefix lookup bisect to its candidates
+        self.sorted_names = sorted(self.names)
+        self._prefixes: dict[str, int] = {}
+
+    def position(self, col_num: int) -> int:
+        # where column col_num of the export sits in the rows being scored
+        return col_num
+
+    def find_name(self, name: str) -> int:
+        if name not in self.names:
+            raise ColumnResolutionException(f"no column named {name!r}")
+        return self.names[name]
+
+    def find_prefix(self, prefix: str) -> int:
+        if prefix in self._prefixes:
+            return self._prefixes[prefix]
+        matches = []
+        i = bisect_left(self.sorted_names, prefix)
+        while i < len(self.sorted_names) and self.sorted_names[i].startswith(prefix):
+            matches.append(self.names[self.sorted_names[i]])
+            i += 1
+        if not matches:
+            raise ColumnResolutionException(f"no column starts with {prefix!r}")
+        self._prefixes[prefix] = min(matches)
+        return self._prefixes[prefix]
+
+
+class ProjectedHeaderIndex(HeaderIndex):
+    # resolves against the full header, but positions refer to rows that
+    # only keep `columns`, in that order
+    def __init__(self, header_row: Sequence, columns: Sequence[int]):
+        super().__init__(header_row)
+        self.columns = list(columns)
+        self.positions = {col_num: i for i, col_num in enumerate(self.columns)}
+
+    def position(self, col_num: int) -> int:
+        if col_num not in self.positions:
+            raise ColumnResolutionException(f"column {col_num} was projected out")
+        return self.positions[col_num]
+
+
+_INDEX_CACHE_SIZE = 16
+_index_cache: "OrderedDict[str, HeaderIndex]" = OrderedDict()
+
+
+def header_index(header_row: Sequence, fingerprint: str = None) -> HeaderIndex:
+    if fingerprint is None:
+        fingerprint = header_fingerprint(header_row)
+    if fingerprint in _index_cache:
+        _index_cache.move_to_end(fingerprint)
+        return _index_cache[fingerprint]
+    index = HeaderIndex(header_row)
+    _index_cache[fingerprint] = index
+    if len(_index_cache) > _INDEX_CACHE_SIZE:
+        _index_cache.popitem(last=False)
+    return index
@@ -1,5 +1,452 @@
+from contextlib import ExitStack, contextmanager, nullcontext
 from pathlib import Path
-from jotform_summary.csv_mapping import Loader
+import json
+
+from jotform_summary.options import BACKENDS, ON_ERROR, OUTPUT_FORMATS
+from jotform_summary.reader import ExportReader, open_export, read_export
 import click
 
+# The CLI may run once per submission, so modules only some commands or
+# options need (pydantic and the manifest model, sqlite3, asyncio,
+# multiprocessing, the caches) are imported where they are used.
+
+
+def load_manifest(manifest_path: Path, only=None):
+    # validated and compiled once per distinct manifest file content
+    from jotform_summary.manifest_cache import load_compiled_manifest
+    return load_compiled_manifest(manifest_path, only)
+
+
+@contextmanager
+def open_sink(output_format: str, output, append: bool = False):
+    # text formats go to a file or stdout; sqlite writes a table in a database
+    from jotform_summary.sinks import SqliteSink, make_sink
+    if output_format == "sqlite":
+        if str(output) == "-":
+            raise click.UsageError("--format sqlite needs an output file")
+        with SqliteSink(output, append=append) as sink:
+            yield sink
+        return
+    mode = "a" if append else "w"
+    with click.open_file(output, mode, encoding="utf-8") as out:
+        yield make_sink(output_format, out, append)
+
+
+@click.group(name="jotform-summary")
+def cli():
+    pass
+
+
+@cli.command()
+@click.argument("export", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+def index(export):
+    """Build the record offset index for EXPORT.csv."""
+    with ExportReader(export) as reader:
+        click.echo(f"{reader.submission_count()} submissions indexed")
+
+
+@cli.command()
+@click.argument(
+    "export", type=click.Path(dir_okay=False, allow_dash=True, path_type=Path)
+)
+@click.option(
+    "--manifest", "manifest_path", required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@click.option(
+    "--output", "-o", type=click.Path(dir_okay=False, allow_dash=True),
+    default="-",
+    help="Where to write scored submissions (default: stdout).",
+)
+@click.option(
+    "--workers", type=click.IntRange(min=1), default=1, show_default=True,
+    help="Number of worker processes to score with. Each parses its own "
+    "share of an export file, so the result cache is only used when --cache "
+    "is given.",
+)
+@click.option(
+    "--chunk-size", type=click.IntRange(min=1), default=500, show_default=True,
+    help="Submissions sent to a worker, or reduced together, at a time.",
+)
+@click.option(
+    "--backend", type=click.Choice(BACKENDS), default="python",
+    show_default=True,
+    help="Run group reductions per row in Python or over chunks with NumPy.",
+)
+@click.option(
+    "--format", "output_format", type=click.Choice(OUTPUT_FORMATS),
+    default="text", show_default=True,
+    help="text blocks, JSON Lines records, or CSV or a SQLite table with a "
+    "column per cargo item.",
+)
+@click.option(
+    "--submission", "submission_num", type=click.IntRange(min=0), default=None,
+    help="Score only this submission (0 is the first row after the header), "
+    "using the export's record offset index.",
+)
+@click.option(
+    "--checkpoint", "checkpoint_path", default=None,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Score only submissions appended since the last run with this "
+    "checkpoint file, appending to --output.",
+)
+@click.option(
+    "--cache", "cache_path", default=None,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="SQLite result cache (default: $XDG_CACHE_HOME/jotform-summary).",
+)
+@click.option(
+    "--no-cache", is_flag=True, help="Score every submission from scratch.",
+)
+@click.option(
+    "--cache-stats", is_flag=True, help="Print cache hits and misses to stderr.",
+)
+@click.option(
+    "--only", default=None,
+    help="Comma-separated cargo names or labels to output; entries they do "
+    "not depend on are skipped.",
+)
+@click.option(
+    "--profile", "profile_path", default=None,
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help="Write time, calls and cells per descriptor and phase as JSON here, "
+    "and print the slowest to stderr.",
+)
+@click.option(
+    "--profile-top", type=click.IntRange(min=1), default=10, show_default=True,
+    help="Rows in the --profile table.",
+)
+@click.option(
+    "--aggregates", "aggregates_path", default=None,
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help="Write count, mean, variance, min/max and a histogram of every group "
+    "and derived score over the scored submissions as JSON here.",
+)
+@click.option(
+    "--bin-width", type=click.FloatRange(min=0, min_open=True), default=10.0,
+    show_default=True, help="Width of the --aggregates histogram bins.",
+)
+@click.option(
+    "--on-error", type=click.Choice(ON_ERROR), default=None,
+    help="When a submission cannot be scored: stop the run (fail, the "
+    "default), leave it out (skip) or leave it out and record it in the "
+    "--quarantine file (quarantine). skip and quarantine need a format that "
+    "numbers submissions (jsonl, csv or sqlite).",
+)
+@click.option(
+    "--quarantine", "quarantine_path", default=None,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Failed submissions as JSON Lines (default: EXPORT.quarantine.jsonl).",
+)
+@click.option(
+    "--rescore-quarantine", is_flag=True,
+    help="Score only the submissions in the --quarantine file, appending to "
+    "--output, and rewrite it with those that still fail. Implies "
+    "--on-error quarantine.",
+)
+def score(
+    export, manifest_path, output, workers, chunk_size, backend,
+    output_format, submission_num, checkpoint_path, cache_path, no_cache,
+    cache_stats, only, profile_path, profile_top, aggregates_path, bin_width,
+    on_error, quarantine_path, rescore_quarantine
+):
+    """Score every submission in EXPORT.csv against a manifest."""
+    from jotform_summary.csv_mapping import ManifestGraphException
+    from jotform_summary.sinks import TeeSink
+    from jotform_summary.vectorized import BackendException, resolve_backend
+    try:
+        backend = resolve_backend(backend)
+    except BackendException as e:
+        raise click.UsageError(str(e))
+    if checkpoint_path is not None and (
+        submission_num is not None or str(export) == "-"
+    ):
+        raise click.UsageError(
+            "--checkpoint needs an export file and cannot be used with --submission"
+        )
+    if profile_path is not None and workers > 1:
+        raise click.UsageError("--profile scores in a single process")
+    if rescore_quarantine and (
+        checkpoint_path is not None or submission_num is not None
+        or str(export) == "-"
+    ):
+        raise click.UsageError(
+            "--rescore-quarantine needs an export file and cannot be used "
+            "with --checkpoint or --submission"
+        )
+    if on_error is None:
+        on_error = "quarantine" if rescore_quarantine else "fail"
+    if rescore_quarantine and on_error != "quarantine":
+        # anything else would leave the rescored submissions in the file,
+        # to be appended again by the next rescore
+        raise click.UsageError("--rescore-quarantine needs --on-error quarantine")
+    if on_error != "fail" and output_format == "text":
+        # text blocks carry no submission number, so once one is left out
+        # they no longer line up with the export
+        raise click.UsageError(
+            f"--on-error {on_error} needs --format jsonl, csv or sqlite"
+        )
+    if quarantine_path is None and (on_error == "quarantine" or rescore_quarantine):
+        if str(export) == "-":
+            raise click.UsageError("give --quarantine when reading stdin")
+        quarantine_path = Path(f"{export}.quarantine.jsonl")
+    profile = None
+    if profile_path is not None:
+        from jotform_summary.profiling import Profile
+        profile = Profile()
+    if only is not None:
+        only = [label.strip() for label in only.split(",") if label.strip()]
+    try:
+        with profile.phase("validate") if profile else nullcontext():
+            compiled = load_manifest(manifest_path, only)
+    except ManifestGraphException as e:
+        raise click.BadParameter(str(e), param_hint="--only")
+    if profile is not None:
+        compiled = profile.instrument(compiled)
+    aggregates = None
+    if aggregates_path is not None:
+        from jotform_summary.aggregates import CohortAggregates
+        aggregates = CohortAggregates(bin_width)
+
+    def wrap_sink(sink):
+        # aggregates see the values the sink does, in this process, so
+        # submissions served from the cache or rescored after a failure are
+        # counted too; ScoringPool.aggregates is for callers that only need
+        # the aggregates
+        if aggregates is not None:
+            sink = TeeSink(sink, aggregates)
+        if profile is not None:
+            sink = profile.sink(sink)
+        return sink
+
+    try:
+        _score(
+            export, compiled, output, workers, chunk_size, backend,
+            output_format, submission_num, checkpoint_path, cache_path,
+            no_cache, cache_stats, profile, wrap_sink, on_error,
+            quarantine_path, rescore_quarantine
+        )
+    finally:
+        if profile is not None:
+            with click.open_file(profile_path, "w", encoding="utf-8") as f:
+                profile.dump(f)
+            click.echo(profile.table(profile_top), err=True)
+    if aggregates is not None:
+        with click.open_file(aggregates_path, "w", encoding="utf-8") as f:
+            json.dump(aggregates.dict(), f, indent=2)
+            f.write("\n")
+
+
+def _score(
+    export, compiled, output, workers, chunk_size, backend, output_format,
+    submission_num, checkpoint_path, cache_path, no_cache, cache_stats, profile,
+    wrap_sink, on_error, quarantine_path, rescore_quarantine
+):
+    if submission_num is not None:
+        with ExportReader(export) as reader:
+            if submission_num >= reader.submission_count():
+                raise click.BadParameter(
+                    f"{export} has {reader.submission_count()} submissions",
+                    param_hint="--submission",
+                )
+            rows = [reader.header, reader.submission(submission_num)]
+            with open_sink(output_format, output) as sink:
+                sink = wrap_sink(sink)
+                sink.start(compiled.output_steps(reader.header))
+                sink.write(compiled.values(rows), submission_num)
+                sink.finish()
+        return
+    # workers parse the export themselves unless rows must pass through
+    # this process: from stdin, a checkpoint, the quarantine or the cache
+    export_workers = (
+        workers > 1 and str(export) != "-" and checkpoint_path is None
+        and not rescore_quarantine
+    )
+    if no_cache or (export_workers and cache_path is None):
+        cache_context = nullcontext(None)
+    else:
+        from jotform_summary.cache import ResultCache, default_cache_path
+        cache_context = ResultCache(cache_path or default_cache_path())
+    failures = []
+    if rescore_quarantine:
+        from jotform_summary.quarantine import read_quarantine
+        try:
+            failures = read_quarantine(quarantine_path)
+        except FileNotFoundError:
+            raise click.BadParameter(
+                f"{quarantine_path} does not exist", param_hint="--quarantine"
+            )
+    run = None
+    if checkpoint_path is not None:
+        from jotform_summary.checkpoint import IncrementalRun
+        output_path = (
+            None if output_format == "sqlite" or str(output) == "-"
+            else Path(output)
+        )
+        run = IncrementalRun(compiled, export, checkpoint_path, output_path)
+    if on_error == "quarantine":
+        from jotform_summary.quarantine import Quarantine
+        # a resumed run does not rescore what earlier runs quarantined
+        quarantine_context = Quarantine(
+            quarantine_path, append=run is not None and run.resumed
+        )
+    else:
+        quarantine_context = nullcontext(None)
+    with cache_context as cache, quarantine_context as quarantine:
+        score_options = dict(
+            workers=workers, chunk_size=chunk_size, backend=backend, cache=cache,
+            on_error=on_error, quarantine=quarantine,
+        )
+        if rescore_quarantine:
+            from jotform_summary.pipeline import score_rows
+            numbers = sorted({failure.submission for failure in failures})
+            with ExportReader(export) as reader, open_sink(
+                output_format, output, append=True
+            ) as sink:
+                rows = iter([
+                    reader.header, *(reader.submission(n) for n in numbers)
+                ])
+                score_rows(
+                    compiled, rows, wrap_sink(sink),
+                    submission_numbers=numbers, **score_options
+                )
+        elif run is not None and run.output_path is not None:
+            mode = "a" if run.resumed else "w"
+            with click.open_file(output, mode, encoding="utf-8") as out:
+                from jotform_summary.sinks import make_sink
+                sink = make_sink(output_format, out, run.resumed)
+                run.run(wrap_sink(sink), output=out, **score_options)
+        elif run is not None:
+            with open_sink(output_format, output, run.resumed) as sink:
+                run.run(wrap_sink(sink), **score_options)
+        elif export_workers and cache is None:
+            from jotform_summary.pipeline import score_export
+            with open_sink(output_format, output) as sink:
+                score_export(
+                    compiled, export, wrap_sink(sink), workers, chunk_size,
+                    backend, on_error, quarantine,
+                )
+        else:
+            from jotform_summary.pipeline import score_rows
+            with open_export(export) as f, open_sink(output_format, output) as sink:
+                sink = wrap_sink(sink)
+                rows = read_export(f)
+                if profile is not None:
+                    rows = profile.rows("parse", rows)
+                score_rows(compiled, rows, sink, **score_options)
+        if cache_stats and cache is not None:
+            click.echo(
+                f"cache: {cache.hits} hits, {cache.misses} misses", err=True
+            )
+        if quarantine is not None and (quarantine.count or rescore_quarantine):
+            click.echo(
+                f"{quarantine.count} submissions quarantined to {quarantine_path}",
+                err=True,
+            )
+
+
+
+@cli.command("score-many")
+@click.argument(
+    "export", type=click.Path(dir_okay=False, allow_dash=True, path_type=Path)
+)
+@click.option(
+    "--manifest", "manifest_paths", required=True, multiple=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Repeat for each instrument to score.",
+)
+@click.option(
+    "--output-dir", required=True,
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Each manifest's output goes to <manifest name>.<format> here.",
+)
+@click.option(
+    "--format", "output_format", type=click.Choice(OUTPUT_FORMATS),
+    default="text", show_default=True,
+)
+def score_many(export, manifest_paths, output_dir, output_format):
+    """Score EXPORT.csv against several manifests in one pass."""
+    stems = [manifest_path.stem for manifest_path in manifest_paths]
+    if len(set(stems)) != len(stems):
+        raise click.UsageError("manifest file names must be distinct")
+    from jotform_summary.multi import MultiManifestRunner
+    runner = MultiManifestRunner(
+        load_manifest(manifest_path) for manifest_path in manifest_paths
+    )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with ExitStack() as stack:
+        sinks = [
+            stack.enter_context(open_sink(
+                output_format, output_dir / f"{stem}.{output_format}"
+            ))
+            for stem in stems
+        ]
+        rows = read_export(stack.enter_context(open_export(export)))
+        header_row = next(rows, None)
+        if header_row is not None:
+            runner.write(header_row, rows, sinks)
+
+
+@cli.command()
+@click.option(
+    "--manifest", "manifest_path", required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@click.option(
+    "--header", "header_path", required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="An export of the form; its header row is the column layout "
+    "submissions are mapped onto.",
+)
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=click.IntRange(0, 65535), default=8080, show_default=True)
+@click.option(
+    "--output", "-o", type=click.Path(dir_okay=False, allow_dash=True),
+    default="-",
+    help="Where to write scored submissions (default: stdout).",
+)
+@click.option(
+    "--format", "output_format", type=click.Choice(OUTPUT_FORMATS),
+    default="jsonl", show_default=True,
+)
+@click.option(
+    "--batch-size", type=click.IntRange(min=1), default=100, show_default=True,
+    help="Most submissions scored together.",
+)
+@click.option(
+    "--batch-timeout", type=click.FloatRange(min=0), default=0.05,
+    show_default=True,
+    help="Seconds to wait for a batch to fill after its first submission.",
+)
+@click.option(
+    "--queue-size", type=click.IntRange(min=1), default=1000, show_default=True,
+    help="Submissions waiting to be scored before new ones get a 503.",
+)
+def serve(
+    manifest_path, header_path, host, port, output, output_format, batch_size,
+    batch_timeout, queue_size
+):
+    """Score submissions POSTed to /submissions as they arrive.
+
+    A submission is a JSON array of export cells, or a JSON object, form or
+    multipart form keyed by header name or column number. Jotform's webhook
+    keys its fields by question id, so it needs a relay that renames them.
+    """
+    import asyncio
+    from jotform_summary.server import ScoringServer, serve as serve_submissions
+    compiled = load_manifest(manifest_path)
+    with open_export(header_path) as f:
+        header_row = next(read_export(f), None)
+    if header_row is None:
+        raise click.BadParameter(f"{header_path} is empty", param_hint="--header")
+    with open_sink(output_format, output) as sink:
+        server = ScoringServer(
+            compiled, header_row, sink, batch_size, batch_timeout, queue_size,
+        )
+        click.echo(f"listening on {host}:{port}", err=True)
+        asyncio.run(serve_submissions(server, host, port))
+        click.echo(json.dumps(server.stats.dict()), err=True)
+
 
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import Iterable, Optional, Union
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+
+import pydantic
+
+from jotform_summary.cache_paths import cache_dir, code_fingerprint
+from jotform_summary.csv_mapping import CompiledManifest, compile_manifest
+
+# the key also covers the package source and the pydantic version, so pickles
+# written by other code are ignored; bump this when the pickle layout itself
+# changes
+CACHE_VERSION = 1
+
+
+def default_manifest_cache_dir() -> Path:
+    return cache_dir() / "manifests"
+
+
+def manifest_cache_key(data: bytes, only: Optional[Iterable[str]] = None) -> str:
+    # the manifest file's content hash, plus anything that changes what
+    # compiling it produces
+    digest = hashlib.sha256()
+    digest.update(
+        f"{CACHE_VERSION}:{sys.version_info[:2]}:{pydantic.VERSION}:".encode("utf-8")
+    )
+    digest.update(code_fingerprint().encode("utf-8"))
+    digest.update(json.dumps(None if only is None else sorted(set(only))).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def load_compiled_manifest(
+    path: Union[str, Path],
+    only: Optional[Iterable[str]] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> CompiledManifest:
+    # a compiled manifest from the cache when the file's content was compiled
+    # before, otherwise validated, compiled and cached. An unreadable cache
+    # entry is treated as a miss
+    data = Path(path).read_bytes()
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_manifest_cache_dir()
+    cache_path = cache_dir / f"{manifest_cache_key(data, only)}.pickle"
+    try:
+        with cache_path.open("rb") as f:
+            compiled = pickle.load(f)
+        if isinstance(compiled, CompiledManifest):
+            return compiled
+    except Exception:
+        pass
+    compiled = compile_manifest(json.loads(data), only)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return compiled
@@ -0,0 +1,92 @@
+from typing import Iterable, Iterator, Union
+
+from jotform_summary.csv_mapping import (
+    CompiledManifest, Manifest, column_position, compile_manifest
+)
+from jotform_summary.header_index import header_index
+from jotform_summary.sinks import Sink
+
+
+class _PreloadEntry:
+    # a preload reading only raw cells of the submission row is shared by
+    # every manifest that has an identical one; others run on the view
+    def __init__(self, preloader, preload_step, index, touched: set):
+        self.preload_step = preload_step
+        self.positions = tuple(
+            column_position(col_num, index)
+            for col_num in preloader.resolve_columns(index)
+        )
+        self.get = preloader.map.get
+        self.shared = preloader.row_num == 1 and not touched & set(self.positions)
+        self.key = (self.positions, preloader.map.json())
+        if preloader.row_num == 1:
+            touched.update(self.positions)
+
+
+class MultiManifestRunner:
+    def __init__(
+        self, manifests: Iterable[Union[dict, Manifest, CompiledManifest]]
+    ):
+        self.manifests = [compile_manifest(manifest) for manifest in manifests]
+        self.preload_runs = 0
+        self.preload_reuses = 0
+
+    def _bind(self, header_row: list) -> list[tuple]:
+        index = header_index(header_row)
+        bound = []
+        for compiled in self.manifests:
+            plan = compiled.bind(header_row)
+            touched: set[int] = set()
+            entries = [
+                _PreloadEntry(preloader, preload_step, index, touched)
+                for preloader, preload_step in zip(
+                    compiled.manifest.preload, plan.preload_steps
+                )
+            ]
+            copy_header = any(
+                preloader.row_num == 0 for preloader in compiled.manifest.preload
+            )
+            bound.append((entries, plan.evaluate, copy_header))
+        return bound
+
+    def values_iter(self, header_row: list, rows: Iterable[list]) -> Iterator[list]:
+        # yields, per submission, one list of values per manifest; the parsed
+        # row itself is never mutated
+        bound = self._bind(header_row)
+        for row in rows:
+            shared: dict = {}
+            results = []
+            for entries, evaluate, copy_header in bound:
+                view = list(row)
+                submission = [list(header_row) if copy_header else header_row, view]
+                for entry in entries:
+                    if not entry.shared:
+                        entry.preload_step(submission)
+                        continue
+                    values = shared.get(entry.key)
+                    if values is None:
+                        get = entry.get
+                        values = shared[entry.key] = [
+                            get(row[col_num]) for col_num in entry.positions
+                        ]
+                        self.preload_runs += 1
+                    else:
+                        self.preload_reuses += 1
+                    for col_num, value in zip(entry.positions, values):
+                        view[col_num] = value
+                results.append(evaluate(submission))
+            yield results
+
+    def write(
+        self, header_row: list, rows: Iterable[list], sinks: list[Sink]
+    ) -> int:
+        for compiled, sink in zip(self.manifests, sinks):
+            sink.start(compiled.output_steps(header_row))
+        scored = 0
+        for results in self.values_iter(header_row, rows):
+            for sink, values in zip(sinks, results):
+                sink.write(values, scored)
+            scored += 1
+        for sink in sinks:
+            sink.finish()
+        return scored
@@ -0,0 +1,6 @@
+# Choices the CLI offers. main imports this before it knows which command
+# runs, so it stays free of the modules that implement them.
+
+BACKENDS = ("auto", "python", "numpy")
+ON_ERROR = ("fail", "skip", "quarantine")
+OUTPUT_FORMATS = ("text", "jsonl", "csv", "sqlite")
@@ -0,0 +1,186 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from jotform_summary.aggregates import CohortAggregates
+from jotform_summary.csv_mapping import (
+    CompiledManifest, Manifest, compile_manifest, render_text
+)
+from jotform_summary.quarantine import (
+    FailureList, Quarantine, SubmissionFailure, tolerant_values_iter
+)
+from jotform_summary.reader import chunked, read_records
+from jotform_summary.vectorized import values_batch
+
+_worker_manifest: Optional[CompiledManifest] = None
+_worker_header: Optional[list] = None
+_worker_projected: bool = False
+_worker_backend: str = "python"
+
+
+def _init_worker(
+    manifest: Manifest, only: Optional[list[str]], header_row: list,
+    projected: bool, backend: str
+) -> None:
+    global _worker_manifest, _worker_header, _worker_projected, _worker_backend
+    _worker_manifest = manifest.compile(only)
+    _worker_header = header_row
+    _worker_projected = projected
+    _worker_backend = backend
+
+
+def _score_chunk(chunk: list[list]) -> list[list]:
+    return values_batch(
+        _worker_manifest, _worker_header, chunk, _worker_projected,
+        _worker_backend
+    )
+
+
+def _score_records(
+    export_path: str, start: int, end: int, first: int, on_error: str
+) -> tuple[list[tuple[int, list]], list[SubmissionFailure]]:
+    # parses its own share of the export, so the parent only passes offsets;
+    # returns (submission number, values) pairs and the failures to record
+    rows = read_records(export_path, start, end)
+    if on_error == "fail":
+        columns = _worker_manifest.columns(_worker_header)
+        projected = [[row[col_num] for col_num in columns] for row in rows]
+        return list(zip(count(first), _score_chunk(projected))), []
+    failures = FailureList()
+    results = list(tolerant_values_iter(
+        _worker_manifest, _worker_header, rows, _score_chunk, count(first),
+        failures if on_error == "quarantine" else None, projected=True,
+        window_size=max(len(rows), 1),
+    ))
+    return results, failures
+
+
+def _aggregate_chunk(chunk: list[list], bin_width: float) -> CohortAggregates:
+    # only the partial aggregates travel back to the parent process
+    aggregates = CohortAggregates(bin_width)
+    aggregates.start(
+        _worker_manifest.output_steps(_worker_header, _worker_projected)
+    )
+    for values in _score_chunk(chunk):
+        aggregates.write(values)
+    return aggregates
+
+
+class ScoringPool:
+    # worker processes that keep one compiled manifest and header for the
+    # lifetime of the pool, so several row streams can reuse them
+    def __init__(
+        self,
+        manifest: Union[dict, Manifest, CompiledManifest],
+        header_row: list,
+        workers: int,
+        projected: bool = False,
+        backend: str = "python",
+    ):
+        self.workers = workers
+        compiled = compile_manifest(manifest)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                compiled.manifest, compiled.only, list(header_row),
+                projected, backend
+            ),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def values(self, rows: Iterable[list], chunk_size: int = 500) -> Iterator[list]:
+        # at most two chunks per worker are in flight, so memory stays bounded
+        # and results come back in input order
+        max_pending = self.workers * 2
+        pending = deque()
+        for chunk in chunked(rows, chunk_size):
+            pending.append(self.executor.submit(_score_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def export_values(
+        self,
+        export_path: Union[str, Path],
+        ranges: Iterable[tuple[int, int, int]],
+        on_error: str = "fail",
+        quarantine: Optional[Quarantine] = None,
+    ) -> Iterator[tuple[int, list]]:
+        # (submission number, values) for the records in each of ranges, as
+        # from ExportReader.submission_ranges; the pool must be projected.
+        # Failures come back with their chunk and are written to quarantine
+        # in export order
+        max_pending = self.workers * 2
+        pending = deque()
+
+        def results(future):
+            scored, failures = future.result()
+            if quarantine is not None:
+                for failure in failures:
+                    quarantine.write(failure)
+            return scored
+
+        for first, start, end in ranges:
+            pending.append(self.executor.submit(
+                _score_records, str(export_path), start, end, first, on_error
+            ))
+            if len(pending) >= max_pending:
+                yield from results(pending.popleft())
+        while pending:
+            yield from results(pending.popleft())
+
+    def aggregates(
+        self, rows: Iterable[list], chunk_size: int = 500, bin_width: float = 10.0
+    ) -> CohortAggregates:
+        # each chunk is scored and summarised in a worker; the partial
+        # aggregates are merged here as they complete
+        max_pending = self.workers * 2
+        merged = CohortAggregates(bin_width)
+        pending = deque()
+        for chunk in chunked(rows, chunk_size):
+            pending.append(
+                self.executor.submit(_aggregate_chunk, chunk, bin_width)
+            )
+            if len(pending) >= max_pending:
+                merged.merge(pending.popleft().result())
+        while pending:
+            merged.merge(pending.popleft().result())
+        return merged
+
+
+def values_parallel(
+    manifest: Union[dict, Manifest, CompiledManifest],
+    header_row: list,
+    rows: Iterable[list],
+    workers: int,
+    chunk_size: int = 500,
+    projected: bool = False,
+    backend: str = "python",
+) -> Iterator[list]:
+    with ScoringPool(manifest, header_row, workers, projected, backend) as pool:
+        yield from pool.values(rows, chunk_size)
+
+
+def score_parallel(
+    manifest: Union[dict, Manifest, CompiledManifest],
+    header_row: list,
+    rows: Iterable[list],
+    workers: int,
+    chunk_size: int = 500,
+) -> Iterator[str]:
+    compiled = compile_manifest(manifest)
+    output_steps = compiled.output_steps(header_row)
+    for values in values_parallel(compiled, header_row, rows, workers, chunk_size):
+        yield render_text(output_steps, values)
@@ -0,0 +1,112 @@
+from contextlib import ExitStack
+from itertools import count
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from jotform_summary.cache import ResultCache, cached_values_iter
+from jotform_summary.csv_mapping import CompiledManifest
+from jotform_summary.parallel import ScoringPool
+from jotform_summary.quarantine import Quarantine, tolerant_values_iter
+from jotform_summary.reader import ExportReader
+from jotform_summary.sinks import Sink
+from jotform_summary.vectorized import values_iter_vectorized
+
+
+def score_rows(
+    compiled: CompiledManifest,
+    rows: Iterator[list],
+    sink: Sink,
+    workers: int = 1,
+    chunk_size: int = 500,
+    backend: str = "python",
+    cache: Optional[ResultCache] = None,
+    on_error: str = "fail",
+    quarantine: Optional[Quarantine] = None,
+    submission_numbers: Optional[Iterable[int]] = None,
+) -> int:
+    # rows starts with the header row; returns the number of submissions
+    # scored. With on_error "skip" or "quarantine", submissions a descriptor
+    # fails on are left out (and written to quarantine) instead of ending the
+    # run. submission_numbers are the rows' numbers in the export, passed to
+    # the sink and the quarantine, counting from 0 by default
+    header_row = next(rows, None)
+    if header_row is None:
+        return 0
+    scored = 0
+    if submission_numbers is None:
+        submission_numbers = count()
+    with ExitStack() as stack:
+        if workers > 1:
+            pool = stack.enter_context(ScoringPool(
+                compiled, header_row, workers, projected=True, backend=backend
+            ))
+            compute = lambda rows: pool.values(rows, chunk_size)
+            window_size = chunk_size * workers * 2
+        elif backend == "numpy":
+            compute = lambda rows: values_iter_vectorized(
+                compiled, header_row, rows, projected=True, backend=backend,
+                chunk_size=chunk_size,
+            )
+            window_size = chunk_size
+        else:
+            compute = lambda rows: compiled.values_iter(
+                header_row, rows, projected=True
+            )
+            window_size = chunk_size
+        if cache is not None:
+            uncached = compute
+            compute = lambda rows: cached_values_iter(
+                compiled, header_row, rows, cache, uncached, projected=True,
+                window_size=window_size,
+            )
+        if on_error == "fail":
+            results = zip(
+                submission_numbers, compute(compiled.project(header_row, rows))
+            )
+        else:
+            # rows are projected window by window there, so a short row is
+            # one more failing submission
+            results = tolerant_values_iter(
+                compiled, header_row, rows, compute, submission_numbers,
+                quarantine if on_error == "quarantine" else None,
+                projected=True, window_size=window_size,
+            )
+        sink.start(compiled.output_steps(header_row))
+        for submission, values in results:
+            sink.write(values, submission)
+            scored += 1
+        sink.finish()
+    return scored
+
+
+def score_export(
+    compiled: CompiledManifest,
+    export_path: Union[str, Path],
+    sink: Sink,
+    workers: int,
+    chunk_size: int = 500,
+    backend: str = "python",
+    on_error: str = "fail",
+    quarantine: Optional[Quarantine] = None,
+) -> int:
+    # score_rows for an export file with no result cache: the workers parse
+    # their own byte ranges of it, so the parent neither parses rows nor
+    # pickles them. Returns the number of submissions scored
+    with ExportReader(export_path) as reader:
+        if not len(reader):
+            return 0
+        header_row = reader.header
+        ranges = list(reader.submission_ranges(chunk_size))
+    scored = 0
+    with ScoringPool(
+        compiled, header_row, workers, projected=True, backend=backend
+    ) as pool:
+        sink.start(compiled.output_steps(header_row))
+        for submission, values in pool.export_values(
+            export_path, ranges, on_error,
+            quarantine if on_error == "quarantine" else None,
+        ):
+            sink.write(values, submission)
+            scored += 1
+        sink.finish()
+    return scored
@@ -0,0 +1,210 @@
+import json
+import time
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+from jotform_summary.csv_mapping import (
+    CompiledManifest, DerivedLoadingDescription, GroupLoadingDescription,
+    OutputStep, Plan
+)
+from jotform_summary.reducers import Reducer
+from jotform_summary.sinks import Sink
+
+# Profiling wraps the steps of a bound plan, the row iterator and the sink in
+# timing closures. Nothing in the scoring loops checks whether it is enabled:
+# an unprofiled run executes exactly the code it did before.
+
+
+class ProfileEntry:
+    __slots__ = ("seconds", "calls", "cells")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.cells = 0
+
+    def dict(self) -> dict:
+        return {
+            "seconds": round(self.seconds, 6),
+            "calls": self.calls,
+            "cells": self.cells,
+        }
+
+
+class Profile:
+    def __init__(self):
+        self.entries: dict[str, ProfileEntry] = {}
+        self.started = time.perf_counter()
+
+    def entry(self, name: str) -> ProfileEntry:
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = self.entries[name] = ProfileEntry()
+        return entry
+
+    def phase(self, name: str) -> "ProfilePhase":
+        return ProfilePhase(self.entry(name))
+
+    def rows(self, name: str, rows: Iterable[list]) -> Iterator[list]:
+        # times the work done producing each row, e.g. CSV parsing
+        entry = self.entry(name)
+        perf_counter = time.perf_counter
+        iterator = iter(rows)
+        while True:
+            start = perf_counter()
+            row = next(iterator, None)
+            entry.seconds += perf_counter() - start
+            if row is None:
+                return
+            entry.calls += 1
+            entry.cells += len(row)
+            yield row
+
+    def sink(self, sink: Sink, name: str = "sink") -> "ProfiledSink":
+        return ProfiledSink(sink, self.entry(name))
+
+    def instrument(self, compiled: CompiledManifest) -> "ProfiledManifest":
+        return ProfiledManifest(compiled, self)
+
+    def report(self) -> dict:
+        return {
+            "wall_seconds": round(time.perf_counter() - self.started, 6),
+            "entries": {
+                name: entry.dict()
+                for name, entry in sorted(
+                    self.entries.items(), key=lambda item: -item[1].seconds
+                )
+            },
+        }
+
+    def dump(self, file: TextIO) -> None:
+        json.dump(self.report(), file, indent=2)
+        file.write("\n")
+
+    def table(self, top: int = 10) -> str:
+        report = self.report()
+        wall = report["wall_seconds"] or 1.0
+        entries = list(report["entries"].items())[:top]
+        width = max([len("name"), *(len(name) for name, _ in entries)])
+        lines = [f"{'name':<{width}}  {'seconds':>10}  {'%':>6}  {'calls':>9}  {'cells':>11}"]
+        for name, entry in entries:
+            lines.append(
+                f"{name:<{width}}  {entry['seconds']:>10.4f}  "
+                f"{entry['seconds'] / wall * 100:>6.1f}  "
+                f"{entry['calls']:>9}  {entry['cells']:>11}"
+            )
+        return "\n".join(lines)
+
+
+class ProfilePhase:
+    def __init__(self, entry: ProfileEntry):
+        self.entry = entry
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.entry.seconds += time.perf_counter() - self.start
+        self.entry.calls += 1
+
+
+def timed(entry: ProfileEntry, function: Callable, cells: int) -> Callable:
+    perf_counter = time.perf_counter
+
+    def wrapper(arg):
+        start = perf_counter()
+        try:
+            return function(arg)
+        finally:
+            entry.seconds += perf_counter() - start
+            entry.calls += 1
+            entry.cells += cells
+    return wrapper
+
+
+def timed_matrix(entry: ProfileEntry, function: Callable) -> Callable:
+    # numpy reducers see a submissions x columns matrix per call
+    perf_counter = time.perf_counter
+
+    def wrapper(matrix):
+        start = perf_counter()
+        try:
+            return function(matrix)
+        finally:
+            entry.seconds += perf_counter() - start
+            entry.calls += len(matrix)
+            entry.cells += matrix.size
+    return wrapper
+
+
+class ProfiledSink:
+    def __init__(self, sink: Sink, entry: ProfileEntry):
+        self.inner = sink
+        self.entry = entry
+
+    def start(self, output_steps: list) -> None:
+        with ProfilePhase(self.entry):
+            self.inner.start(output_steps)
+
+    def write(self, values: list, submission: Optional[int] = None) -> None:
+        start = time.perf_counter()
+        self.inner.write(values, submission)
+        self.entry.seconds += time.perf_counter() - start
+        self.entry.calls += 1
+        self.entry.cells += len(values)
+
+    def finish(self) -> None:
+        with ProfilePhase(self.entry):
+            self.inner.finish()
+
+
+class ProfiledManifest(CompiledManifest):
+    # a compiled manifest whose bound plans record time, calls and cells
+    # per preload and cargo descriptor
+    def __init__(self, compiled: CompiledManifest, profile: Profile):
+        super().__init__(compiled.manifest, compiled.only)
+        self.profile = profile
+        self._profiled: dict[int, tuple[Plan, Plan]] = {}
+
+    def bind(self, header_row: list, projected: bool = False) -> Plan:
+        plan = super().bind(header_row, projected)
+        profiled = self._profiled.get(id(plan))
+        if profiled is None:
+            profiled = self._profiled[id(plan)] = (plan, self._instrument(plan))
+        return profiled[1]
+
+    def _instrument(self, plan: Plan) -> Plan:
+        profile = self.profile
+        preload_steps = [
+            timed(
+                profile.entry(f"preload {i}"), preload_step,
+                len(list(preloader.resolve_columns(plan.index)))
+            )
+            for i, (preloader, preload_step) in enumerate(
+                zip(self.manifest.preload, plan.preload_steps)
+            )
+        ]
+        steps: list[Optional[OutputStep]] = list(plan.steps)
+        for i in plan.order:
+            step = steps[i]
+            loading_description = self.manifest.cargo[i]
+            entry = profile.entry(f"cargo {i} ({step.key})")
+            if type(loading_description) == DerivedLoadingDescription:
+                cells = 0
+            elif type(loading_description) == GroupLoadingDescription:
+                cells = len(step.group.positions)
+            else:
+                cells = 1
+            group = step.group
+            if group is not None and group.reducer.numpy is not None:
+                group = group._replace(reducer=Reducer(
+                    group.reducer.python, timed_matrix(entry, group.reducer.numpy)
+                ))
+            steps[i] = step._replace(
+                value=timed(entry, step.value, cells), group=group
+            )
+        return plan._replace(
+            preload_steps=preload_steps,
+            output_steps=[steps[i] for i in plan.visible],
+            steps=steps,
+        )
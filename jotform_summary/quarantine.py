@@ -0,0 +1,201 @@
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Union
+import json
+
+from jotform_summary.csv_mapping import (
+    CompiledManifest, DerivedLoadingDescription, Plan, column_position
+)
+from jotform_summary.reader import chunked
+
+
+class SubmissionError(Exception):
+    # a descriptor failed on one submission; value is the cell (or cells)
+    # it could not handle
+    def __init__(self, descriptor: str, value: Any, cause: Exception):
+        super().__init__(f"{descriptor}: {cause}")
+        self.descriptor = descriptor
+        self.value = value
+        self.cause = cause
+
+
+class SubmissionFailure(NamedTuple):
+    submission: int
+    descriptor: str
+    value: Any
+    error: str
+
+
+class Quarantine:
+    # JSON Lines of failed submissions: their number in the export (0 is the
+    # first row after the header), the failing descriptor, the offending value
+    # and the error. append=True keeps the failures of earlier runs, e.g. when
+    # resuming from a checkpoint that has moved past them
+    def __init__(self, path: Union[str, Path], append: bool = False):
+        self.path = Path(path)
+        self.file = self.path.open("a" if append else "w", encoding="utf-8")
+        self.count = 0
+
+    def write(self, failure: SubmissionFailure) -> None:
+        self.file.write(json.dumps(failure._asdict(), default=str) + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FailureList(list):
+    # collects failures the way a Quarantine writes them, for a worker
+    # process to hand back to the one that owns the quarantine file
+    def write(self, failure: SubmissionFailure) -> None:
+        self.append(failure)
+
+
+def read_quarantine(path: Union[str, Path]) -> list[SubmissionFailure]:
+    with Path(path).open(encoding="utf-8") as f:
+        return [SubmissionFailure(**json.loads(line)) for line in f if line.strip()]
+
+
+class GuardedManifest(CompiledManifest):
+    # a compiled manifest whose bound plans raise SubmissionError naming the
+    # descriptor that failed. It is only used to rescore submissions that
+    # failed in a batch, so the snapshots it takes cost nothing otherwise
+    def __init__(self, compiled: CompiledManifest):
+        super().__init__(compiled.manifest, compiled.only)
+        self._guarded: dict[int, tuple[Plan, Plan]] = {}
+
+    def bind(self, header_row: list, projected: bool = False) -> Plan:
+        plan = super().bind(header_row, projected)
+        guarded = self._guarded.get(id(plan))
+        if guarded is None:
+            guarded = self._guarded[id(plan)] = (plan, self._guard(plan))
+        return guarded[1]
+
+    def _guard(self, plan: Plan) -> Plan:
+        index = plan.index
+        preload_steps = []
+        for i, (preloader, preload_step) in enumerate(
+            zip(self.manifest.preload, plan.preload_steps)
+        ):
+            positions = [
+                column_position(col_num, index)
+                for col_num in preloader.resolve_columns(index)
+            ]
+            preload_steps.append(
+                guard_preload(f"preload {i}", preload_step, preloader, positions)
+            )
+        steps = list(plan.steps)
+        for i in plan.order:
+            step = steps[i]
+            loading_description = self.manifest.cargo[i]
+            if type(loading_description) == DerivedLoadingDescription:
+                cells = None
+            else:
+                cells = (
+                    loading_description.row_num,
+                    [
+                        column_position(col_num, index)
+                        for col_num in loading_description.referenced_columns(index)
+                    ],
+                )
+            steps[i] = step._replace(
+                value=guard_value(f"cargo {i} ({step.key})", step.value, cells)
+            )
+        return plan._replace(
+            preload_steps=preload_steps,
+            output_steps=[steps[i] for i in plan.visible],
+            steps=steps,
+        )
+
+
+def guard_preload(
+    descriptor: str, preload_step: Callable, preloader, positions: list[int]
+) -> Callable:
+    def preload(rows):
+        row = rows[preloader.row_num]
+        cells = [row[col_num] for col_num in positions]
+        try:
+            preload_step(rows)
+        except Exception as e:
+            # the first cell, in the step's own order, that its map rejects
+            value = None
+            for cell in cells:
+                try:
+                    preloader.map.get(cell)
+                except Exception:
+                    value = cell
+                    break
+            raise SubmissionError(descriptor, value, e) from e
+    return preload
+
+
+def guard_value(
+    descriptor: str, value: Callable, cells: Optional[tuple[int, list[int]]]
+) -> Callable:
+    def guarded(rows):
+        try:
+            return value(rows)
+        except Exception as e:
+            if cells is None:
+                offending = rows
+            else:
+                row_num, positions = cells
+                offending = [rows[row_num][col_num] for col_num in positions]
+                if len(offending) == 1:
+                    offending = offending[0]
+            raise SubmissionError(descriptor, offending, e) from e
+    return guarded
+
+
+def tolerant_values_iter(
+    compiled: CompiledManifest,
+    header_row: list,
+    rows: Iterable[list],
+    compute: Callable[[list[list]], Iterable[list]],
+    submission_numbers: Iterable[int],
+    quarantine: Optional[Union[Quarantine, FailureList]] = None,
+    projected: bool = False,
+    window_size: int = 1000,
+) -> Iterator[tuple[int, list]]:
+    # (submission number, values) of every submission that scores. rows are
+    # export rows; with projected=True they are projected here and compute
+    # scores projected rows. A window with a failing submission, or one too
+    # short for the manifest's columns, is rescored one submission at a time
+    # so the failures can be skipped and, given a quarantine, recorded
+    columns = compiled.columns(header_row)
+    width = columns[-1] + 1 if columns else 0
+    if projected:
+        prepare = lambda row: [row[col_num] for col_num in columns]
+    else:
+        prepare = list
+    guarded = None
+    for window in chunked(zip(submission_numbers, rows), window_size):
+        try:
+            results = list(compute([prepare(row) for _, row in window]))
+        except Exception:
+            if guarded is None:
+                guarded = GuardedManifest(compiled)
+            results = []
+            for submission, row in window:
+                try:
+                    if len(row) < width:
+                        raise SubmissionError("row", len(row), IndexError(
+                            f"{len(row)} cells, the manifest reads column {width - 1}"
+                        ))
+                    results.extend(
+                        guarded.values_iter(header_row, [prepare(row)], projected)
+                    )
+                except SubmissionError as e:
+                    results.append(None)
+                    if quarantine is not None:
+                        quarantine.write(SubmissionFailure(
+                            submission, e.descriptor, e.value, str(e.cause)
+                        ))
+        for (submission, _), values in zip(window, results):
+            if values is not None:
+                yield submission, values
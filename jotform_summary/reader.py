@@ -0,0 +1,208 @@
+from array import array
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO, Union
+import csv
+import io
+import mmap
+import os
+import struct
+import sys
+
+
+def open_export(export_path: Union[str, Path]) -> TextIO:
+    # newline="" keeps newlines inside quoted fields intact for csv.reader
+    if str(export_path) == "-":
+        return io.TextIOWrapper(
+            sys.stdin.buffer, encoding="utf-8", newline="", closefd=False
+        )
+    return open(export_path, encoding="utf-8", newline="")
+
+
+def read_export(export_file) -> Iterator[list[str]]:
+    # rows are produced lazily so only the current submission is held in memory
+    yield from csv.reader(export_file)
+
+
+def chunked(rows: Iterable[list], chunk_size: int) -> Iterator[list[list]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ExportIndexException(Exception):
+    pass
+
+
+def record_offsets(data) -> array:
+    # record boundaries are newlines outside double quotes; an escaped quote
+    # ("") closes and reopens the quoted field, which leaves the state unchanged
+    offsets = array("Q", [0])
+    size = len(data)
+    pos = 0
+    in_quotes = False
+    next_quote = data.find(b'"')
+    next_newline = data.find(b"\n")
+    while pos < size:
+        if in_quotes:
+            if next_quote == -1:
+                raise ExportIndexException("unterminated quoted field")
+            pos = next_quote + 1
+            in_quotes = False
+            next_quote = data.find(b'"', pos)
+        elif next_newline != -1 and next_newline < pos:
+            # skip newlines that were inside the quoted field just closed
+            next_newline = data.find(b"\n", pos)
+        elif next_newline != -1 and (next_quote == -1 or next_newline < next_quote):
+            pos = next_newline + 1
+            offsets.append(pos)
+            next_newline = data.find(b"\n", pos)
+        elif next_quote != -1:
+            pos = next_quote + 1
+            in_quotes = True
+            next_quote = data.find(b'"', pos)
+        else:
+            pos = size
+    if offsets[-1] != size:
+        offsets.append(size)
+    return offsets
+
+
+class ExportIndex:
+    # persisted as <export>.idx: magic, export size and mtime, then offsets
+    MAGIC = b"JFIDX001"
+    HEADER = struct.Struct("<8sQQ")
+
+    def __init__(self, offsets: array, size: int, mtime_ns: int):
+        self.offsets = offsets
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @staticmethod
+    def path_for(export_path: Path) -> Path:
+        return export_path.with_name(export_path.name + ".idx")
+
+    @classmethod
+    def build(cls, export_path: Path, data) -> "ExportIndex":
+        stat = export_path.stat()
+        return cls(record_offsets(data), stat.st_size, stat.st_mtime_ns)
+
+    @classmethod
+    def load(cls, export_path: Path) -> Optional["ExportIndex"]:
+        index_path = cls.path_for(export_path)
+        if not index_path.exists():
+            return None
+        stat = export_path.stat()
+        with index_path.open("rb") as f:
+            magic, size, mtime_ns = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if (magic, size, mtime_ns) != (cls.MAGIC, stat.st_size, stat.st_mtime_ns):
+                return None
+            offsets = array("Q")
+            offsets.frombytes(f.read())
+        return cls(offsets, size, mtime_ns)
+
+    def save(self, export_path: Path) -> None:
+        index_path = self.path_for(export_path)
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.size, self.mtime_ns))
+            self.offsets.tofile(f)
+        os.replace(tmp_path, index_path)
+
+
+class ExportReader:
+    # record 0 is the header row, records 1.. are submissions
+    def __init__(self, export_path: Union[str, Path], persist_index: bool = True):
+        self.path = Path(export_path)
+        self._file = self.path.open("rb")
+        if self.path.stat().st_size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b""
+        index = ExportIndex.load(self.path)
+        if index is None:
+            index = ExportIndex.build(self.path, self.data)
+            if persist_index:
+                try:
+                    index.save(self.path)
+                except OSError:
+                    # e.g. a read-only export directory; the index is only
+                    # kept for this reader
+                    pass
+        self.index = index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def header(self) -> list[str]:
+        return self.record(0)
+
+    def submission_count(self) -> int:
+        return max(len(self) - 1, 0)
+
+    def record(self, record_num: int) -> list[str]:
+        if not 0 <= record_num < len(self):
+            raise IndexError(f"record {record_num} out of range")
+        offsets = self.index.offsets
+        return self._parse(offsets[record_num], offsets[record_num + 1])[0]
+
+    def submission(self, submission_num: int) -> list[str]:
+        return self.record(submission_num + 1)
+
+    def byte_ranges(self, parts: int) -> list[tuple[int, int]]:
+        # split the submissions into at most `parts` ranges on record boundaries
+        offsets = self.index.offsets
+        count = self.submission_count()
+        parts = max(1, min(parts, count))
+        bounds = [1 + count * part // parts for part in range(parts + 1)]
+        return [
+            (offsets[start], offsets[end])
+            for start, end in zip(bounds, bounds[1:])
+        ]
+
+    def submission_ranges(self, chunk_size: int) -> Iterator[tuple[int, int, int]]:
+        # (number of the first submission, start, end) for each run of
+        # chunk_size submissions, for workers that parse their own
+        offsets = self.index.offsets
+        for first in range(1, len(self), chunk_size):
+            last = min(first + chunk_size, len(self))
+            yield first - 1, offsets[first], offsets[last]
+
+    def rows(self, start: int, end: int) -> Iterator[list[str]]:
+        yield from self._parse(start, end)
+
+    def _parse(self, start: int, end: int) -> list[list[str]]:
+        return parse_records(self.data[start:end], start)
+
+
+def parse_records(data: bytes, start: int = 0) -> list[list[str]]:
+    # data starts on a record boundary `start` bytes into the export
+    encoding = "utf-8-sig" if start == 0 else "utf-8"
+    text = data.decode(encoding)
+    return list(csv.reader(io.StringIO(text, newline="")))
+
+
+def read_records(export_path: Union[str, Path], start: int, end: int) -> list[list[str]]:
+    # the records between two offsets from an ExportIndex, without indexing
+    # or mapping the whole export
+    with open(export_path, "rb") as f:
+        f.seek(start)
+        return parse_records(f.read(end - start), start)
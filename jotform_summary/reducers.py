@@ -0,0 +1,126 @@
+from functools import reduce
+from typing import Callable, NamedTuple, Optional
+
+# numpy is optional and slow to import, so it is loaded the first time the
+# numpy backend needs it; `from jotform_summary.reducers import np` still
+# gives the module, or None when it is not installed
+_UNLOADED = object()
+_np = _UNLOADED
+
+
+def load_numpy():
+    global _np
+    if _np is _UNLOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
+
+
+def __getattr__(name):
+    if name == "np":
+        return load_numpy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class Reducer(NamedTuple):
+    # python reduces one group (a list of cells); numpy reduces a
+    # submissions x columns float matrix to one value per submission
+    python: Callable[[list], float]
+    numpy: Optional[Callable] = None
+
+
+def _add(x, y):
+    return float(x) + y
+
+def _multiply(x, y):
+    return float(x) * y
+
+def reduce_sum(group):
+    return reduce(_add, group)
+
+def reduce_multiple(group):
+    return reduce(_multiply, group)
+
+def reduce_average(group):
+    return reduce(_add, group) / len(group)
+
+def reduce_min(group):
+    return float(min(group))
+
+def reduce_max(group):
+    return float(max(group))
+
+def reduce_count_true(group):
+    return float(sum(1 for value in group if value))
+
+def reduce_percentage(group):
+    return reduce_average(group) * 100
+
+# accumulate runs left to right like functools.reduce, so both backends
+# round identically
+def numpy_sum(matrix):
+    return load_numpy().add.accumulate(matrix, axis=1)[:, -1]
+
+def numpy_multiple(matrix):
+    return load_numpy().multiply.accumulate(matrix, axis=1)[:, -1]
+
+def numpy_average(matrix):
+    return numpy_sum(matrix) / matrix.shape[1]
+
+def numpy_min(matrix):
+    return matrix.min(axis=1)
+
+def numpy_max(matrix):
+    return matrix.max(axis=1)
+
+def numpy_count_true(matrix):
+    return load_numpy().count_nonzero(matrix, axis=1).astype(float)
+
+def numpy_percentage(matrix):
+    return numpy_average(matrix) * 100
+
+
+REDUCERS: dict[str, Reducer] = {
+    "sum": Reducer(reduce_sum, numpy_sum),
+    "multiple": Reducer(reduce_multiple, numpy_multiple),
+    "average": Reducer(reduce_average, numpy_average),
+    "min": Reducer(reduce_min, numpy_min),
+    "max": Reducer(reduce_max, numpy_max),
+    "count_true": Reducer(reduce_count_true, numpy_count_true),
+    "percentage": Reducer(reduce_percentage, numpy_percentage),
+}
+
+
+def register_reducer(
+    name: str,
+    python: Callable[[list], float],
+    numpy: Optional[Callable] = None,
+) -> None:
+    REDUCERS[name] = Reducer(python, numpy)
+
+
+def scaled(reducer: Reducer, factor) -> Reducer:
+    numpy = reducer.numpy
+    return Reducer(
+        lambda group: reducer.python(group) * factor,
+        None if numpy is None else lambda matrix: numpy(matrix) * factor,
+    )
+
+
+def weighted_sum(weights: list[float]) -> Reducer:
+    weights = tuple(weights)
+
+    def python(group):
+        if len(group) != len(weights):
+            raise ValueError(
+                f"weighted_sum has {len(weights)} weights for {len(group)} columns"
+            )
+        return reduce_sum([value * weight for value, weight in zip(group, weights)])
+
+    def numpy(matrix):
+        return numpy_sum(matrix * load_numpy().asarray(weights, dtype=float))
+
+    return Reducer(python, numpy)
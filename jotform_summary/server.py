@@ -0,0 +1,329 @@
+import asyncio
+import json
+import signal
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any, Optional, Union
+from urllib.parse import parse_qsl
+
+from jotform_summary.csv_mapping import CompiledManifest
+from jotform_summary.sinks import Sink
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+MAX_BODY = 1 << 20
+
+
+class PayloadException(Exception):
+    pass
+
+
+class BatchException(Exception):
+    # a batch failed as a whole, e.g. because the sink could not write it
+    pass
+
+
+class PayloadMapper:
+    # turns a posted submission into a projected row: the cells of the
+    # manifest's columns in export order. Objects are keyed by header name
+    # or column number, lists are whole export rows in column order.
+    # Jotform's own webhook names its fields after question ids (q3_name),
+    # not export headers, so it needs a relay that renames them
+    def __init__(self, compiled: CompiledManifest, header_row: list):
+        self.header_row = header_row
+        self.columns = compiled.columns(header_row)
+        self.keys = [
+            (str(col_num), header_row[col_num]) for col_num in self.columns
+        ]
+
+    def row(self, payload: Union[dict, list]) -> list:
+        if type(payload) == list:
+            if len(payload) != len(self.header_row):
+                raise PayloadException(
+                    f"expected {len(self.header_row)} cells, got {len(payload)}"
+                )
+            return [cell(payload[col_num]) for col_num in self.columns]
+        if type(payload) == dict:
+            return [
+                cell(payload[number] if number in payload else payload.get(name, ""))
+                for number, name in self.keys
+            ]
+        raise PayloadException("a submission is a JSON object or array")
+
+
+def cell(value: Any) -> str:
+    # exports write multiple selections one per line
+    if value is None:
+        return ""
+    if type(value) == list:
+        return "\n".join(cell(item) for item in value)
+    return str(value)
+
+
+def parse_payload(content_type: str, body: bytes) -> Union[dict, list]:
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return dict(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+        if content_type.startswith("multipart/form-data"):
+            return parse_form_data(content_type, body)
+        return json.loads(body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise PayloadException(f"could not parse submission: {e}")
+
+
+def parse_form_data(content_type: str, body: bytes) -> dict:
+    # a field sent more than once, like a checkbox question, becomes a list
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+    )
+    if not message.is_multipart():
+        raise PayloadException("could not parse submission: no form fields")
+    fields: dict[str, Any] = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name is None:
+            continue
+        value = part.get_payload(decode=True).decode(
+            part.get_content_charset() or "utf-8"
+        )
+        if name not in fields:
+            fields[name] = value
+        elif type(fields[name]) == list:
+            fields[name].append(value)
+        else:
+            fields[name] = [fields[name], value]
+    return fields
+
+
+class LatencyStats:
+    # latencies of the most recent submissions, received to scored
+    def __init__(self, window: int = 10000):
+        self.latencies: deque = deque(maxlen=window)
+        self.count = 0
+        self.batches = 0
+
+    def record(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+        self.count += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def dict(self) -> dict:
+        p50 = self.percentile(0.5)
+        p99 = self.percentile(0.99)
+        return {
+            "scored": self.count,
+            "batches": self.batches,
+            "p50_ms": None if p50 is None else round(p50 * 1000, 3),
+            "p99_ms": None if p99 is None else round(p99 * 1000, 3),
+        }
+
+
+class ScoringServer:
+    # HTTP/1.1 endpoint that queues posted submissions and scores them in
+    # micro-batches of up to batch_size, or whatever arrived within
+    # batch_timeout seconds of the first, on a worker thread. A full queue
+    # answers 503 so Jotform retries later instead of the backlog growing
+    def __init__(
+        self,
+        compiled: CompiledManifest,
+        header_row: list,
+        sink: Sink,
+        batch_size: int = 100,
+        batch_timeout: float = 0.05,
+        queue_size: int = 1000,
+    ):
+        self.compiled = compiled
+        self.header_row = header_row
+        self.sink = sink
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.queue_size = queue_size
+        self.mapper = PayloadMapper(compiled, header_row)
+        self.output_steps = compiled.output_steps(header_row, projected=True)
+        # created in start(): before Python 3.10 a queue binds to the event
+        # loop current when it is built, which is not the one asyncio.run uses
+        self.queue: Optional[asyncio.Queue] = None
+        self.stats = LatencyStats()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.batcher: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> int:
+        # returns the bound port, so port=0 picks a free one
+        self.queue = asyncio.Queue(self.queue_size)
+        self.sink.start(self.output_steps)
+        self.batcher = asyncio.create_task(self._batches())
+        self.server = await asyncio.start_server(self._connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        # stops accepting connections, scores what is queued, then finishes
+        # the sink
+        self.server.close()
+        await self.server.wait_closed()
+        await self.queue.join()
+        self.batcher.cancel()
+        self.executor.shutdown()
+        self.sink.finish()
+
+    async def submit(self, row: list) -> list:
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((row, future, time.perf_counter()))
+        return await future
+
+    async def _batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+            try:
+                try:
+                    results = await loop.run_in_executor(
+                        self.executor, self._score, [row for row, _, _ in batch]
+                    )
+                except Exception as e:
+                    # fails this batch's submissions; later batches are
+                    # still scored
+                    error = BatchException(f"could not score submission: {e}")
+                    results = [error] * len(batch)
+                now = time.perf_counter()
+                self.stats.batches += 1
+                for (_, future, received), result in zip(batch, results):
+                    self.stats.record(now - received)
+                    if not future.done():
+                        if isinstance(result, Exception):
+                            future.set_exception(result)
+                        else:
+                            future.set_result(result)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _score(self, rows: list[list]) -> list:
+        # runs on the worker thread; a batch that fails is rescored row by
+        # row so one bad submission does not fail the others
+        try:
+            results = list(self.compiled.values_iter(
+                self.header_row, rows, projected=True
+            ))
+        except Exception:
+            results = []
+            for row in rows:
+                try:
+                    results.extend(self.compiled.values_iter(
+                        self.header_row, [row], projected=True
+                    ))
+                except Exception as e:
+                    results.append(e)
+        for values in results:
+            if not isinstance(values, Exception):
+                self.sink.write(values)
+        return results
+
+    def record(self, values: list) -> dict:
+        return {
+            output_step.key: value
+            for output_step, value in zip(self.output_steps, values)
+            if value is not None
+        }
+
+    async def _connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0") or 0)
+                if length > MAX_BODY:
+                    await respond(writer, 413, {"error": "submission too large"})
+                    break
+                body = await reader.readexactly(length)
+                method, path, *_ = request_line.decode("latin-1").split()
+                status, response = await self._handle(
+                    method, path, headers.get("content-type", ""), body
+                )
+                await respond(writer, status, response)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(
+        self, method: str, path: str, content_type: str, body: bytes
+    ) -> tuple[int, Any]:
+        if method == "GET" and path == "/stats":
+            return 200, {**self.stats.dict(), "queued": self.queue.qsize()}
+        if method != "POST" or path != "/submissions":
+            return 404, {"error": f"no route for {method} {path}"}
+        try:
+            row = self.mapper.row(parse_payload(content_type, body))
+        except PayloadException as e:
+            return 400, {"error": str(e)}
+        try:
+            values = await self.submit(row)
+        except asyncio.QueueFull:
+            return 503, {"error": "scoring queue is full"}
+        except BatchException as e:
+            return 500, {"error": str(e)}
+        except Exception as e:
+            return 422, {"error": str(e)}
+        return 200, self.record(values)
+
+
+async def respond(writer: asyncio.StreamWriter, status: int, body: Any) -> None:
+    data = json.dumps(body).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+    )
+    await writer.drain()
+
+
+async def serve(server: ScoringServer, host: str, port: int) -> None:
+    # runs until SIGINT or SIGTERM, then drains the queue before returning
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await server.start(host, port)
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
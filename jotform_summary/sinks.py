@@ -0,0 +1,250 @@
+from pathlib import Path
+from typing import Any, Optional, Protocol, TextIO, Union
+import csv
+import io
+import json
+import sqlite3
+
+
+class OutputStepProtocol(Protocol):
+    key: str
+    prefix: str
+
+
+class Sink(Protocol):
+    # start() gets the output steps of the manifest being scored and may be
+    # called once per Loader, so sinks shared across Loaders must tolerate it.
+    # write() gets the submission's number in the export (0 is the first row
+    # after the header) when the caller knows it
+    def start(self, output_steps: list[OutputStepProtocol]) -> None:
+        ...
+
+    def write(self, values: list[Any], submission: Optional[int] = None) -> None:
+        ...
+
+    def finish(self) -> None:
+        ...
+
+
+class TextSink:
+    def __init__(self, file: TextIO, separator: str = ""):
+        self.file = file
+        self.separator = separator
+        self.output_steps: list[OutputStepProtocol] = []
+
+    def start(self, output_steps):
+        self.output_steps = output_steps
+
+    def write(self, values, submission=None):
+        write = self.file.write
+        for output_step, value in zip(self.output_steps, values):
+            if value is not None:
+                write(output_step.prefix + str(value) + "\n")
+        if self.separator:
+            write(self.separator)
+
+    def finish(self):
+        pass
+
+
+class StringSink(TextSink):
+    def __init__(self, separator: str = ""):
+        super().__init__(io.StringIO(), separator)
+
+    def getvalue(self) -> str:
+        return self.file.getvalue()
+
+
+class JsonLinesSink:
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.keys: list[str] = []
+
+    def start(self, output_steps):
+        self.keys = unique_keys(output_steps)
+
+    def write(self, values, submission=None):
+        record = {} if submission is None else {"submission": submission}
+        for key, value in zip(self.keys, values):
+            if value is not None:
+                record[key] = value
+        self.file.write(json.dumps(record) + "\n")
+
+    def finish(self):
+        pass
+
+
+class CsvSink:
+    # header=False is for appending to a file that already has its header row;
+    # numbered=True leads each row with a submission column
+    def __init__(self, file: TextIO, header: bool = True, numbered: bool = False):
+        self.writer = csv.writer(file)
+        self.keys: list[str] = []
+        self.header = header
+        self.numbered = numbered
+
+    def start(self, output_steps):
+        keys = unique_keys(output_steps)
+        if keys != self.keys:
+            if self.header:
+                self.writer.writerow(["submission", *keys] if self.numbered else keys)
+            self.keys = keys
+            self.header = True
+
+    def write(self, values, submission=None):
+        row = ["" if value is None else value for value in values]
+        if self.numbered:
+            row.insert(0, "" if submission is None else submission)
+        self.writer.writerow(row)
+
+    def finish(self):
+        pass
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteSink:
+    # one row per submission with a column per cargo item: REAL for group and
+    # derived scores, TEXT for scalars. The submission column is the number
+    # written with the row, or the next rowid when there is none, and a row
+    # written again for the same submission replaces it. Rows are inserted
+    # with executemany in batches, committing every commit_every rows;
+    # append=False replaces the table, append=True adds to it
+    def __init__(
+        self,
+        path: Union[str, Path],
+        table: str = "scores",
+        append: bool = False,
+        batch_size: int = 10_000,
+        commit_every: int = 500_000,
+    ):
+        # the connection may be handed to one writer thread, e.g. by serve
+        self.db = sqlite3.connect(
+            str(path), isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.table = table
+        self.append = append
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.keys: list[str] = []
+        self.insert: Optional[str] = None
+        self.pending: list[list] = []
+        self.uncommitted = 0
+
+    def start(self, output_steps):
+        keys = [output_step.key for output_step in output_steps]
+        if keys == self.keys:
+            return
+        self.flush()
+        self.commit()
+        self.keys = keys
+        columns = sqlite_columns(output_steps)
+        table = quote_identifier(self.table)
+        if not self.append:
+            self.db.execute(f"DROP TABLE IF EXISTS {table}")
+        self.db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (submission INTEGER PRIMARY KEY, "
+            + ", ".join(f"{quote_identifier(name)} {type}" for name, type in columns)
+            + ")"
+        )
+        self.insert = (
+            f"INSERT OR REPLACE INTO {table} (submission, "
+            + ", ".join(quote_identifier(name) for name, _ in columns)
+            + ") VALUES (?" + ", ?" * len(columns) + ")"
+        )
+        self.append = True
+
+    def write(self, values, submission=None):
+        self.pending.append([submission, *values])
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        if not self.db.in_transaction:
+            self.db.execute("BEGIN")
+        self.db.executemany(self.insert, self.pending)
+        self.uncommitted += len(self.pending)
+        self.pending = []
+        if self.uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self) -> None:
+        if self.db.in_transaction:
+            self.db.execute("COMMIT")
+        self.uncommitted = 0
+
+    def finish(self):
+        self.flush()
+        self.commit()
+
+    def close(self) -> None:
+        self.finish()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def unique_keys(output_steps) -> list[str]:
+    # the output keys, made unique by suffixing repeats and kept clear of the
+    # submission number, for outputs that need one name per value
+    keys = []
+    seen: dict[str, int] = {"submission": 1}
+    for output_step in output_steps:
+        key = output_step.key
+        while key in seen:
+            seen[output_step.key] += 1
+            key = f"{output_step.key} ({seen[output_step.key]})"
+        seen[key] = 1
+        keys.append(key)
+    return keys
+
+
+def sqlite_columns(output_steps) -> list[tuple[str, str]]:
+    # a column per unique output key, REAL for group and derived scores
+    columns = []
+    for output_step, name in zip(output_steps, unique_keys(output_steps)):
+        numeric = (
+            getattr(output_step, "group", None) is not None
+            or getattr(output_step, "inputs", None) is not None
+        )
+        columns.append((name, "REAL" if numeric else "TEXT"))
+    return columns
+
+
+class TeeSink:
+    # forwards everything to each of several sinks, e.g. output and aggregates
+    def __init__(self, *sinks: Sink):
+        self.sinks = sinks
+
+    def start(self, output_steps):
+        for sink in self.sinks:
+            sink.start(output_steps)
+
+    def write(self, values, submission=None):
+        for sink in self.sinks:
+            sink.write(values, submission)
+
+    def finish(self):
+        for sink in self.sinks:
+            sink.finish()
+
+
+SINKS = {
+    "text": lambda file, append: TextSink(file, separator="\n"),
+    "jsonl": lambda file, append: JsonLinesSink(file),
+    "csv": lambda file, append: CsvSink(file, header=not append, numbered=True),
+}
+
+
+def make_sink(output_format: str, file: TextIO, append: bool = False) -> Sink:
+    return SINKS[output_format](file, append)
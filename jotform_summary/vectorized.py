@@ -0,0 +1,109 @@
+from operator import itemgetter
+from typing import Iterable, Iterator
+
+from jotform_summary.csv_mapping import CompiledManifest
+from jotform_summary.options import BACKENDS
+from jotform_summary.reader import chunked
+from jotform_summary.reducers import load_numpy
+
+
+class BackendException(Exception):
+    pass
+
+
+def resolve_backend(backend: str) -> str:
+    if backend == "auto":
+        return "python" if load_numpy() is None else "numpy"
+    if backend == "numpy" and load_numpy() is None:
+        raise BackendException("the numpy backend needs numpy installed")
+    if backend not in BACKENDS:
+        raise BackendException(f"unknown backend {backend!r}")
+    return backend
+
+
+def _vectorizable(output_step) -> bool:
+    # single-cell groups keep the python result type, so they stay per-row
+    group = output_step.group
+    return (
+        group is not None
+        and group.row_num == 1
+        and group.reducer.numpy is not None
+        and len(group.positions) > 1
+    )
+
+
+def values_batch(
+    compiled: CompiledManifest,
+    header_row: list,
+    rows: Iterable[list],
+    projected: bool = False,
+    backend: str = "auto",
+) -> list[list]:
+    # same values as compiled.values_iter, with group reductions run over
+    # a submissions x columns matrix when the numpy backend is used
+    backend = resolve_backend(backend)
+    plan = compiled.bind(header_row, projected)
+    if projected:
+        header_row = [header_row[col_num] for col_num in plan.index.columns]
+    submissions = []
+    for row in rows:
+        submission = [header_row, list(row)]
+        for preload_step in plan.preload_steps:
+            preload_step(submission)
+        submissions.append(submission)
+    if not submissions:
+        return []
+    if not plan.output_steps:
+        return [[] for _ in submissions]
+
+    steps = plan.steps
+    vectorized = {
+        i for i in plan.order
+        if backend == "numpy" and _vectorizable(steps[i])
+    }
+    columns: list = [None] * len(steps)
+    if vectorized:
+        positions = sorted({
+            position
+            for i in vectorized
+            for position in steps[i].group.positions
+        })
+        get_cells = itemgetter(*positions)
+        matrix = load_numpy().array(
+            [get_cells(submission[1]) for submission in submissions], dtype=float
+        )
+        matrix_col = {position: i for i, position in enumerate(positions)}
+
+    # steps run in dependency order, so derived steps read finished columns
+    for i in plan.order:
+        output_step = steps[i]
+        if output_step.inputs is not None:
+            columns[i] = [
+                None if None in inputs else output_step.value(list(inputs))
+                for inputs in zip(*(columns[j] for j in output_step.inputs))
+            ]
+            continue
+        if i not in vectorized:
+            columns[i] = [
+                output_step.value(submission) for submission in submissions
+            ]
+            continue
+        cols = [matrix_col[position] for position in output_step.group.positions]
+        if cols == list(range(cols[0], cols[-1] + 1)):
+            group_matrix = matrix[:, cols[0]:cols[-1] + 1]
+        else:
+            group_matrix = matrix[:, cols]
+        columns[i] = output_step.group.reducer.numpy(group_matrix).tolist()
+    return [list(values) for values in zip(*(columns[i] for i in plan.visible))]
+
+
+def values_iter_vectorized(
+    compiled: CompiledManifest,
+    header_row: list,
+    rows: Iterable[list],
+    projected: bool = False,
+    backend: str = "auto",
+    chunk_size: int = 1000,
+) -> Iterator[list]:
+    for chunk in chunked(rows, chunk_size):
+        yield from values_batch(compiled, header_row, chunk, projected, backend)
@@ -0,0 +1,22 @@
+import json
+import pytest
+from benchmarks.synthetic import GOTTMAN_MANIFEST, read_fixture
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_home(tmp_path, monkeypatch):
+    # keep the CLI's default result cache out of the real home directory
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def export_rows():
+    # test_data/submission.csv: the header row, then its two submissions
+    header, submissions = read_fixture()
+    return [header, *submissions]
+
+
+@pytest.fixture
+def gottman_manifest():
+    with GOTTMAN_MANIFEST.open() as f:
+        return json.load(f)
@@ -1,5 +1,9 @@
 import pathlib
 import csv
+import json
+from benchmarks.synthetic import generate_export, manifests
+from jotform_summary.csv_mapping import Loader, score_batch
+from jotform_summary.reader import ExportIndex, ExportReader
 
 def tests_submission_csv_input():
     file_path = pathlib.Path('test_data/submission.csv')
@@ -8,4 +12,49 @@ def tests_submission_csv_input():
         rows = list(csv_reader)
     assert(len(rows) == 3)
     for row in rows:
-        assert(len(row) == 575)
\ No newline at end of file
+        assert(len(row) == 575)
+
+def test_batch_matches_single_row_loaders():
+    with pathlib.Path('test_data/gottman_manifest.json').open() as f:
+        manifest = json.load(f)
+    with pathlib.Path('test_data/submission.csv').open() as f:
+        header, *submissions = list(csv.reader(f))
+    expected = [
+        Loader(manifest, [header, list(row)]).get_string()
+        for row in submissions
+    ]
+    assert(score_batch(manifest, header, submissions) == expected)
+    assert(expected[0] != expected[1])
+
+def test_export_reader_matches_csv_reader(tmp_path):
+    export = tmp_path / 'submission.csv'
+    export.write_bytes(pathlib.Path('test_data/submission.csv').read_bytes())
+    with export.open(newline='') as f:
+        rows = list(csv.reader(f))
+    with ExportReader(export) as reader:
+        assert(len(reader) == 3)
+        assert(reader.header == rows[0])
+        assert(reader.submission(1) == rows[2])
+        assert([
+            row for start, end in reader.byte_ranges(2)
+            for row in reader.rows(start, end)
+        ] == rows[1:])
+    # the persisted index is picked up on the next open
+    assert(ExportIndex.load(export) is not None)
+    with ExportReader(export) as reader:
+        assert(reader.submission(0) == rows[1])
+
+def test_synthetic_export_scores_with_every_manifest(tmp_path):
+    export = tmp_path / "export.csv"
+    generate_export(export, 50, seed=3)
+    with export.open(newline="") as f:
+        header, *submissions = list(csv.reader(f))
+    assert(len(submissions) == 50)
+    assert({len(row) for row in submissions} == {575})
+    assert(any("\n" in cell for row in submissions for cell in row))
+    for manifest in manifests().values():
+        results = score_batch(manifest, header, [list(row) for row in submissions])
+        assert(len(results) == 50)
+    again = tmp_path / "again.csv"
+    generate_export(again, 50, seed=3)
+    assert(again.read_bytes() == export.read_bytes())
@@ -0,0 +1,116 @@
+import json
+import random
+import statistics
+import pytest
+from click.testing import CliRunner
+from jotform_summary.aggregates import CohortAggregates, RunningStats
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.main import cli
+from jotform_summary.parallel import ScoringPool
+
+MANIFEST = 'test_data/gottman_manifest.json'
+EXPORT = 'test_data/submission.csv'
+
+
+def test_running_stats_match_statistics_module():
+    values = [random.Random(4).uniform(-5, 105) for _ in range(500)]
+    stats = RunningStats(bin_width=25)
+    for value in values:
+        stats.add(value)
+    stats.add(None)
+    summary = stats.dict()
+    assert(summary["count"] == 500 and summary["missing"] == 1)
+    assert(summary["mean"] == pytest.approx(statistics.fmean(values)))
+    assert(summary["variance"] == pytest.approx(statistics.pvariance(values)))
+    assert((summary["min"], summary["max"]) == (min(values), max(values)))
+    assert(sum(bin["count"] for bin in summary["histogram"]) == 500)
+    assert(summary["histogram"][0]["start"] == min(values) // 25 * 25)
+
+
+def test_merged_partials_equal_one_pass():
+    values = [random.Random(5).gauss(50, 20) for _ in range(300)]
+    whole = RunningStats()
+    parts = [RunningStats() for _ in range(3)]
+    for i, value in enumerate(values):
+        whole.add(value)
+        parts[i % 3].add(value)
+    merged = RunningStats()
+    for part in parts:
+        merged.merge(part)
+    assert(merged.count == whole.count and merged.bins == whole.bins)
+    assert(merged.mean == pytest.approx(whole.mean))
+    assert(merged.variance == pytest.approx(whole.variance))
+    with pytest.raises(ValueError):
+        merged.merge(RunningStats(bin_width=5))
+
+
+def test_cohort_aggregates_cover_group_and_derived_scores():
+    manifest = {
+        "cargo": [
+            {"load_type": "scalar", "label": "Name: ", "col_num": 0, "row_num": 1},
+            {"load_type": "group", "label": "g: ", "name": "g", "cols": [1, 2], "reduce": "sum"},
+            {"load_type": "derived", "label": "d: ", "inputs": ["g"], "reduce": {"sum_then_multiply_by": 2}},
+        ]
+    }
+    header = ["name", "q1", "q2"]
+    compiled = compile_manifest(manifest)
+    aggregates = CohortAggregates()
+    compiled.write(header, [["a", 1, 2], ["b", 3, 4]], aggregates)
+    summary = aggregates.dict()
+    assert(list(summary) == ["g", "d"])
+    assert(summary["g"]["mean"] == 5.0)
+    assert(summary["d"]["max"] == 14.0)
+
+
+def test_repeated_labels_keep_separate_stats():
+    manifest = {
+        "cargo": [
+            {"load_type": "group", "label": "Total: ", "cols": [0, 1], "reduce": "sum"},
+            {"load_type": "group", "label": "Total: ", "cols": [0, 1], "reduce": "max"},
+        ]
+    }
+    aggregates = CohortAggregates()
+    compile_manifest(manifest).write(["q1", "q2"], [[1, 2], [3, 4]], aggregates)
+    summary = aggregates.dict()
+    assert(list(summary) == ["Total", "Total (2)"])
+    assert((summary["Total"]["mean"], summary["Total (2)"]["mean"]) == (5.0, 3.0))
+
+
+def test_merge_copies_stats_and_checks_bin_width():
+    part = CohortAggregates()
+    part.stats["g"] = RunningStats()
+    part.stats["g"].add(3.0)
+    merged = CohortAggregates()
+    merged.merge(part)
+    part.stats["g"].add(100.0)
+    assert(merged.stats["g"] is not part.stats["g"])
+    assert(merged.dict()["g"]["count"] == 1 and merged.dict()["g"]["mean"] == 3.0)
+    with pytest.raises(ValueError):
+        CohortAggregates(bin_width=5).merge(part)
+
+
+def test_parallel_partial_aggregates_match_serial(gottman_manifest, export_rows):
+    manifest = gottman_manifest
+    header, *submissions = export_rows
+    rows = [list(submissions[i % 2]) for i in range(25)]
+    serial = CohortAggregates()
+    compile_manifest(manifest).write(header, [list(row) for row in rows], serial)
+    with ScoringPool(manifest, header, workers=2) as pool:
+        merged = pool.aggregates(rows, chunk_size=4)
+    assert(merged.dict().keys() == serial.dict().keys())
+    for key, stats in serial.dict().items():
+        assert(merged.dict()[key] == pytest.approx(stats))
+
+
+def test_score_writes_aggregates(tmp_path):
+    aggregates_path = tmp_path / "aggregates.json"
+    result = CliRunner().invoke(cli, [
+        "score", EXPORT, "--manifest", MANIFEST, "--output", str(tmp_path / "out.txt"),
+        "--aggregates", str(aggregates_path), "--bin-width", "5",
+    ])
+    assert(result.exit_code == 0)
+    summary = json.loads(aggregates_path.read_text())
+    assert(summary["Lock Wallace Agreement"]["mean"] == 17.5)
+    assert(summary["Lock Wallace Agreement"]["histogram"] == [
+        {"start": 15.0, "count": 2}
+    ])
@@ -0,0 +1,86 @@
+import pytest
+from jotform_summary import cache as cache_module
+from jotform_summary.cache import ResultCache, cached_values_iter
+from jotform_summary.csv_mapping import compile_manifest
+
+
+@pytest.fixture
+def compiled(gottman_manifest):
+    return compile_manifest(gottman_manifest)
+
+
+def score(compiled, header, rows, cache):
+    computed = []
+
+    def compute(misses):
+        computed.extend(misses)
+        return compiled.values_iter(header, [list(row) for row in misses])
+
+    results = list(cached_values_iter(
+        compiled, header, rows, cache, compute, window_size=2
+    ))
+    return results, len(computed)
+
+
+def test_unchanged_submissions_are_served_from_cache(compiled, export_rows):
+    header, *submissions = export_rows
+    expected = list(compiled.values_iter(header, [list(row) for row in submissions]))
+    cache = ResultCache()
+    assert(score(compiled, header, submissions, cache) == (expected, 2))
+    # reordered, with an edit to a column the manifest does not read
+    edited = list(submissions[0])
+    edited[16] = "a different occupation"
+    results, computed = score(compiled, header, [submissions[1], edited], cache)
+    assert((results, computed) == (expected[::-1], 0))
+    assert(cache.stats == {"hits": 2, "misses": 2})
+
+
+def test_edited_submission_is_recomputed(compiled, export_rows):
+    header, *submissions = export_rows
+    cache = ResultCache()
+    score(compiled, header, submissions, cache)
+    edited = list(submissions[0])
+    edited[38] = "False"
+    results, computed = score(compiled, header, [edited, submissions[1]], cache)
+    assert(computed == 1)
+    assert(results[0][1] == 80.0)
+
+
+def test_results_of_other_scoring_code_are_not_reused(
+    compiled, export_rows, monkeypatch
+):
+    header, *submissions = export_rows
+    cache = ResultCache()
+    score(compiled, header, submissions, cache)
+    monkeypatch.setattr(cache_module, "code_fingerprint", lambda: "upgraded")
+    assert(score(compiled, header, submissions, cache)[1] == 2)
+
+
+def test_sqlite_cache_persists_and_evicts(tmp_path):
+    path = tmp_path / "results.sqlite"
+    with ResultCache(path, memory_entries=1, max_entries=2, flush_every=1) as cache:
+        for key in "abc":
+            cache.put(key, [key, 1.0, None])
+        assert(cache.get("b") == ["b", 1.0, None])
+    with ResultCache(path) as cache:
+        assert(cache.get("a") is None)
+        assert(cache.get("c") == ["c", 1.0, None])
+        assert(cache.stats == {"hits": 1, "misses": 1})
+
+
+def test_get_many_reads_a_window_in_one_query(tmp_path):
+    path = tmp_path / "results.sqlite"
+    with ResultCache(path) as cache:
+        for key in "abc":
+            cache.put(key, [key, 1.0, None])
+    with ResultCache(path) as cache:
+        assert(cache.get("c") == ["c", 1.0, None])
+        statements = []
+        cache.db.set_trace_callback(statements.append)
+        found = cache.get_many(["a", "x", "c", "b", "a"])
+        cache.db.set_trace_callback(None)
+        assert([values and values[0] for values in found] == ["a", None, "c", "b", "a"])
+        assert([s for s in statements if s.startswith("SELECT")] == [
+            "SELECT key, value FROM results WHERE key IN ('a', 'x', 'b')"
+        ])
+        assert(cache.stats == {"hits": 5, "misses": 1})
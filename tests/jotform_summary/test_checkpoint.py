@@ -0,0 +1,100 @@
+import csv
+import json
+import pathlib
+from jotform_summary.checkpoint import Checkpoint, IncrementalRun
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.sinks import StringSink
+
+MANIFEST = 'test_data/gottman_manifest.json'
+
+
+def load_compiled(path=MANIFEST):
+    with pathlib.Path(path).open() as f:
+        return compile_manifest(json.load(f))
+
+
+def write_rows(path, rows, mode="w"):
+    with path.open(mode, newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def run(export, checkpoint, compiled=None):
+    sink = StringSink(separator="\n")
+    incremental = IncrementalRun(compiled or load_compiled(), export, checkpoint)
+    scored = incremental.run(sink)
+    return incremental, scored, sink.getvalue()
+
+
+def test_only_appended_rows_are_scored(tmp_path, export_rows):
+    header, first, second = export_rows
+    export = tmp_path / "export.csv"
+    checkpoint = tmp_path / "export.checkpoint"
+    write_rows(export, [header, first])
+    incremental, scored, output = run(export, checkpoint)
+    assert((incremental.resumed, scored) == (False, 1))
+    assert(Checkpoint.load(checkpoint).row_count == 1)
+
+    write_rows(export, [second, first], mode="a")
+    incremental, scored, appended = run(export, checkpoint)
+    assert((incremental.resumed, scored) == (True, 2))
+    full = load_compiled().score_batch(header, [list(first), list(second), list(first)])
+    assert(output + appended == "".join(result + "\n" for result in full))
+    assert(Checkpoint.load(checkpoint).row_count == 3)
+
+    incremental, scored, output = run(export, checkpoint)
+    assert((incremental.resumed, scored, output) == (True, 0, ""))
+
+
+def test_resumes_after_export_without_trailing_newline(tmp_path, export_rows):
+    header, first, second = export_rows
+    export = tmp_path / "export.csv"
+    checkpoint = tmp_path / "export.checkpoint"
+    export.write_bytes(pathlib.Path('test_data/submission.csv').read_bytes())
+    assert(not export.read_bytes().endswith(b"\n"))
+    run(export, checkpoint)
+    with export.open("a", newline="") as f:
+        f.write("\r\n")
+        csv.writer(f).writerow(first)
+    incremental, scored, appended = run(export, checkpoint)
+    assert((incremental.resumed, scored) == (True, 1))
+    assert(appended == load_compiled().score_batch(header, [list(first)])[0] + "\n")
+    assert(Checkpoint.load(checkpoint).row_count == 3)
+
+
+def test_changed_manifest_rescores_everything(tmp_path, export_rows, gottman_manifest):
+    header, first, second = export_rows
+    export = tmp_path / "export.csv"
+    checkpoint = tmp_path / "export.checkpoint"
+    write_rows(export, [header, first, second])
+    run(export, checkpoint)
+    manifest = gottman_manifest
+    manifest["cargo"] = manifest["cargo"][:1]
+    incremental, scored, _ = run(export, checkpoint, compile_manifest(manifest))
+    assert((incremental.resumed, scored) == (False, 2))
+
+
+def test_rewritten_export_rescores_everything(tmp_path, export_rows):
+    header, first, second = export_rows
+    export = tmp_path / "export.csv"
+    checkpoint = tmp_path / "export.checkpoint"
+    write_rows(export, [header, first, second])
+    run(export, checkpoint)
+    write_rows(export, [header, second, first, second])
+    incremental, scored, _ = run(export, checkpoint)
+    assert((incremental.resumed, scored) == (False, 3))
+
+
+def test_shortened_output_rescores_everything(tmp_path, export_rows):
+    header, first, second = export_rows
+    export = tmp_path / "export.csv"
+    checkpoint = tmp_path / "export.checkpoint"
+    output = tmp_path / "scores.txt"
+    write_rows(export, [header, first, second])
+    with output.open("w") as out:
+        out.write("scored\n")
+        incremental = IncrementalRun(load_compiled(), export, checkpoint, output)
+        incremental.run(StringSink(), output=out)
+    assert(Checkpoint.load(checkpoint).output_size == len("scored\n"))
+    output.write_text("")
+    incremental = IncrementalRun(load_compiled(), export, checkpoint, output)
+    assert(not incremental.resumed)
@@ -0,0 +1,46 @@
+import pytest
+from jotform_summary.compact import CompactRows, StringDictionary, compact_values_iter
+from jotform_summary.csv_mapping import RangeMappingException, compile_manifest
+
+
+def test_string_dictionary_round_trip():
+    dictionary = StringDictionary()
+    codes = dictionary.encode_row(["True", "False", "True", ""])
+    assert(list(codes) == [0, 1, 0, 2])
+    assert(dictionary.decode_row(codes) == ["True", "False", "True", ""])
+    assert(len(dictionary) == 3)
+
+
+def test_compact_rows_score_like_plain_rows(gottman_manifest, export_rows):
+    compiled = compile_manifest(gottman_manifest)
+    header, *submissions = export_rows
+    compact_rows = CompactRows.from_rows(submissions)
+    assert(compact_rows.decode(1) == submissions[1])
+    expected = list(compiled.values_iter(header, [list(row) for row in submissions]))
+    assert(list(compact_values_iter(compiled, header, compact_rows)) == expected)
+
+    projected = CompactRows.from_rows(compiled.project(header, submissions))
+    assert(list(compact_values_iter(compiled, header, projected, projected=True))
+           == expected)
+
+
+def test_compact_preload_overlapping_and_unmapped():
+    compiled = compile_manifest({
+        "preload": [
+            {
+                "col_num": {"ranges": [[0, 1]]},
+                "map": {"map_type": "range", "range_map": {"yes": 2, "no": 0}}
+            },
+            {"col_num": 0, "map": {"map_type": "binary", "is_one": "2"}},
+        ],
+        "cargo": [
+            {"load_type": "group", "label": "t: ", "cols": [0, 1], "reduce": "sum"}
+        ]
+    })
+    header = ["a", "b"]
+    compact_rows = CompactRows.from_rows([["yes", "yes"], ["no", "yes"]])
+    assert(list(compact_values_iter(compiled, header, compact_rows)) ==
+           list(compiled.values_iter(header, [["yes", "yes"], ["no", "yes"]])))
+    compact_rows.append(["maybe", "yes"])
+    with pytest.raises(RangeMappingException):
+        list(compact_values_iter(compiled, header, compact_rows))
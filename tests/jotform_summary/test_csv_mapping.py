@@ -1,6 +1,9 @@
 import json
 import pytest
-from jotform_summary.csv_mapping import Loader, RangeMappingException
+from jotform_summary.csv_mapping import (
+    ColumnResolutionException, Loader, Manifest, ManifestGraphException,
+    RangeMappingException, compile_manifest, render_text
+)
 
 # @pytest.fixture
 # def manifest():
@@ -317,3 +320,274 @@ def test_preload_range_errors_when_out_of_range():
     ]
     with pytest.raises(RangeMappingException):
         loader = Loader(manifest, rows)
+
+
+def test_compiled_manifest_scores_many_submissions():
+    compiled = Manifest(**{
+        "preload": [
+            {
+                "col_num": {"ranges": [[0, 1]]},
+                "row_num": 1,
+                "map": {"map_type": "binary", "is_one": "true"}
+            }],
+        "cargo": [
+            {
+                "load_type": "group",
+                "label": "trues: ",
+                "row_num": 1,
+                "cols": {"start": 0, "end": 1},
+                "reduce": "sum"
+            }
+        ]
+    }).compile()
+    header = ["first", "second"]
+    assert(compiled.score([header, ["true", "true"]]) == "trues: 2.0\n")
+    assert(compiled.score([header, ["true", "nope"]]) == "trues: 1.0\n")
+    assert(compiled.score([header, ["nope", "nope"]]) == "trues: 0.0\n")
+
+
+def test_loader_accepts_compiled_manifest():
+    compiled = compile_manifest({"cargo": [
+        {
+            "load_type": "scalar",
+            "label_suffix": " to you",
+            "col_num": 1,
+            "row_num": 1,
+        }
+    ]})
+    for header in (["dang", "happy birthday"], ["dang", "merry christmas"]):
+        loader = Loader(compiled, [header, ["on it", "nope"]])
+        assert(loader.get_string() == header[1] + " to you\n")
+
+
+def test_group_label_from_column_number():
+    manifest = {"cargo": [
+        {
+            "load_type": "group",
+            "label": {"col_num": 2},
+            "label_suffix": ": ",
+            "row_num": 1,
+            "cols": [0, 1],
+            "reduce": "sum"
+        }
+    ]}
+    rows = [
+        ["", "", "Section Score"],
+        [1, 2, ""]
+    ]
+    loader = Loader(manifest, rows)
+    assert(loader.get_string() == "Section Score: 3.0\n")
+
+
+def test_columns_resolved_by_header_name_and_prefix():
+    manifest = {
+        "preload": [
+            {
+                "col_num": {"ranges": [[{"starts_with": "1 -"}, "3 - Sex"]]},
+                "row_num": 1,
+                "map": {"map_type": "binary", "is_one": "True"}
+            }],
+        "cargo": [
+            {
+                "load_type": "scalar",
+                "label": "Comments: ",
+                "col_num": "Comments",
+                "row_num": 1,
+                "ignore_if_empty_string": True,
+                "map": {"map_type": "static_string", "output": "see notes"}
+            },
+            {
+                "load_type": "group",
+                "label": "first two: ",
+                "row_num": 1,
+                "cols": {"start": "1 - Friends", "end": {"starts_with": "2 -"}},
+                "reduce": "sum"
+            },
+            {
+                "load_type": "group",
+                "label": "odd ones: ",
+                "row_num": 1,
+                "cols": [{"starts_with": "1"}, "3 - Sex"],
+                "reduce": "sum"
+            }
+        ]
+    }
+    rows = [
+        ["Comments", "1 - Friends", "2 - Fun", "3 - Sex"],
+        ["", "True", "True", "False"]
+    ]
+    loader = Loader(manifest, rows)
+    assert(loader.get_string() == "first two: 2.0\nodd ones: 1.0\n")
+
+
+def test_compiled_manifest_resolves_each_header_once():
+    compiled = compile_manifest({"cargo": [
+        {
+            "load_type": "group",
+            "label": "total: ",
+            "row_num": 1,
+            "cols": ["b", "a"],
+            "reduce": "sum"
+        }
+    ]})
+    assert(compiled.score_batch(["a", "b"], [[1, 2], [3, 4]]) ==
+           ["total: 3.0\n", "total: 7.0\n"])
+    first = compiled.output_steps(["a", "b"])
+    compiled.output_steps(["b", "a"])
+    assert(compiled.output_steps(["a", "b"]) is first)
+
+
+def test_unknown_column_name_raises():
+    manifest = {"cargo": [
+        {
+            "load_type": "scalar",
+            "col_num": "missing",
+            "row_num": 1,
+        }
+    ]}
+    with pytest.raises(ColumnResolutionException):
+        Loader(manifest, [["a"], ["b"]])
+
+
+def test_manifest_reports_referenced_columns():
+    compiled = compile_manifest({
+        "preload": [
+            {
+                "col_num": {"ranges": [1, [5, 6]]},
+                "map": {"map_type": "binary", "is_one": "True"}
+            }],
+        "cargo": [
+            {"load_type": "scalar", "col_num": "h", "row_num": 1},
+            {
+                "load_type": "group",
+                "label": "g: ",
+                "cols": {"start": 2, "end": 3},
+                "reduce": "sum"
+            },
+            {"load_type": "group", "label": "n: ", "cols": [9, 1], "reduce": "sum"}
+        ]
+    })
+    header = list("abcdefghij")
+    assert(compiled.columns(header) == [1, 2, 3, 5, 6, 7, 9])
+
+
+def test_projected_rows_score_like_full_rows():
+    manifest = {
+        "preload": [
+            {
+                "col_num": {"ranges": [[3, 5]]},
+                "map": {"map_type": "binary", "is_one": "True"}
+            }],
+        "cargo": [
+            {
+                "load_type": "scalar",
+                "label": "Comments: ",
+                "col_num": 1,
+                "row_num": 1,
+                "ignore_if_empty_string": True,
+                "map": {"map_type": "static_string", "output": "see notes"}
+            },
+            {
+                "load_type": "group",
+                "label": {"col_num": 2},
+                "label_suffix": ": ",
+                "cols": {"start": 3, "end": 5},
+                "reduce": "sum"
+            },
+            {"load_type": "group", "label": "odd: ", "cols": [5, 3], "reduce": "sum"}
+        ]
+    }
+    header = ["name", "comments", "Section", "q1", "q2", "q3", "free text"]
+    rows = [
+        ["Carl", "hi", "", "True", "False", "True", "long answer"],
+        ["Wilma", "", "", "True", "True", "True", "long answer"],
+    ]
+    compiled = compile_manifest(manifest)
+    expected = compiled.score_batch(header, [list(row) for row in rows])
+    projected = list(compiled.project(header, rows))
+    assert(projected[0] == ["hi", "True", "False", "True"])
+    results = compiled.values_iter(header, projected, projected=True)
+    output_steps = compiled.output_steps(header, projected=True)
+    assert([render_text(output_steps, values) for values in results] == expected)
+
+
+DERIVED_MANIFEST = {
+    "cargo": [
+        {
+            "load_type": "group", "label": "A: ", "name": "a",
+            "cols": [0, 1], "reduce": "sum", "hidden": True
+        },
+        {"load_type": "group", "label": "B: ", "name": "b", "cols": [2], "reduce": "sum"},
+        {
+            "load_type": "derived", "label": "Total: ", "name": "total",
+            "inputs": ["a", "b"], "reduce": "sum"
+        },
+        {
+            "load_type": "derived", "label": "Scaled: ",
+            "inputs": ["total"], "reduce": {"sum_then_multiply_by": 10}
+        },
+    ]
+}
+DERIVED_HEADER = ["q1", "q2", "q3"]
+
+
+def test_derived_scores_read_named_cargo():
+    compiled = compile_manifest(DERIVED_MANIFEST)
+    assert(compiled.score([DERIVED_HEADER, [1, 2, 4]]) == "B: 4\nTotal: 7.0\nScaled: 70.0\n")
+    assert(
+        [step.key for step in compiled.output_steps(DERIVED_HEADER)]
+        == ["b", "total", "Scaled"]
+    )
+
+
+def test_derived_score_computes_each_input_once():
+    calls = []
+    manifest = json.loads(json.dumps(DERIVED_MANIFEST))
+    manifest["cargo"].append({
+        "load_type": "derived", "label": "Again: ",
+        "inputs": ["total", "a"], "reduce": "sum"
+    })
+    compiled = compile_manifest(manifest)
+    plan = compiled.bind(DERIVED_HEADER)
+    step = plan.steps[0]
+    plan.steps[0] = step._replace(value=lambda rows: calls.append(1) or step.value(rows))
+    assert(plan.evaluate([DERIVED_HEADER, [1, 2, 4]]) == [4, 7, 70, 10])
+    assert(len(calls) == 1)
+
+
+def test_only_skips_entries_not_needed():
+    compiled = compile_manifest(DERIVED_MANIFEST, only=["total"])
+    assert(compiled.score([DERIVED_HEADER, [1, 2, 4]]) == "Total: 7.0\n")
+    assert(compiled.columns(DERIVED_HEADER) == [0, 1, 2])
+    compiled = compile_manifest(DERIVED_MANIFEST, only=["B"])
+    assert(compiled.score([DERIVED_HEADER, [1, 2, 4]]) == "B: 4\n")
+    assert(compiled.columns(DERIVED_HEADER) == [2])
+    with pytest.raises(ManifestGraphException):
+        compile_manifest(DERIVED_MANIFEST, only=["missing"])
+
+
+def test_derived_inputs_must_name_cargo_without_cycles():
+    cyclic = {
+        "cargo": [
+            {"load_type": "derived", "label": "x", "name": "x", "inputs": ["y"], "reduce": "sum"},
+            {"load_type": "derived", "label": "y", "name": "y", "inputs": ["x"], "reduce": "sum"},
+        ]
+    }
+    with pytest.raises(ValueError, match="cycle"):
+        Manifest(**cyclic)
+    unknown = {
+        "cargo": [
+            {"load_type": "derived", "label": "x", "inputs": ["y"], "reduce": "sum"}
+        ]
+    }
+    with pytest.raises(ValueError, match="not a cargo name"):
+        Manifest(**unknown)
+
+
+def test_scoring_leaves_the_callers_rows_unchanged(gottman_manifest, export_rows):
+    header, *submissions = export_rows
+    original = [list(row) for row in submissions]
+    compiled = compile_manifest(gottman_manifest)
+    first = compiled.score_batch(header, submissions)
+    assert(submissions == original)
+    assert(compiled.score_batch(header, submissions) == first)
@@ -0,0 +1,32 @@
+import pytest
+from jotform_summary.header_index import (
+    ColumnResolutionException, HeaderIndex, header_fingerprint, header_index
+)
+
+header = ["Your Age:", "Lock Wallace", "1 - Friends", "2 - Sex", "Lock Wallace"]
+
+
+def test_find_name_returns_first_match():
+    index = HeaderIndex(header)
+    assert(index.find_name("Lock Wallace") == 1)
+    assert(index.find_name("Your Age:") == 0)
+
+
+def test_find_prefix_returns_leftmost_match():
+    index = HeaderIndex(header)
+    assert(index.find_prefix("2 -") == 3)
+    assert(index.find_prefix("Lock") == 1)
+    assert(index.find_prefix("") == 0)
+
+
+def test_missing_columns_raise():
+    index = HeaderIndex(header)
+    with pytest.raises(ColumnResolutionException):
+        index.find_name("Lock")
+    with pytest.raises(ColumnResolutionException):
+        index.find_prefix("3 -")
+
+
+def test_header_index_cached_by_fingerprint():
+    assert(header_index(header) is header_index(list(header)))
+    assert(header_fingerprint(header) != header_fingerprint(header[:-1]))
@@ -0,0 +1,350 @@
+import csv
+import pytest
+import json
+import sqlite3
+import subprocess
+import sys
+from click.testing import CliRunner
+from jotform_summary.csv_mapping import Loader
+from jotform_summary.main import cli, load_manifest
+from jotform_summary.reducers import np
+import pathlib
+
+MANIFEST = 'test_data/gottman_manifest.json'
+EXPORT = 'test_data/submission.csv'
+
+
+def write_export(path, export_rows, n_rows):
+    header, *submissions = export_rows
+    with path.open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(n_rows):
+            writer.writerow(submissions[i % len(submissions)])
+
+
+def cli_runner():
+    # stderr is only kept apart by default from click 8.2 on
+    try:
+        return CliRunner(mix_stderr=False)
+    except TypeError:
+        return CliRunner()
+
+
+def peak_rss_kb(export_path):
+    script = (
+        "import resource, sys\n"
+        "from jotform_summary.main import cli\n"
+        "cli(sys.argv[1:], standalone_mode=False)\n"
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script, "score", str(export_path),
+         "--manifest", MANIFEST, "--output", "/dev/null"],
+        capture_output=True, text=True, check=True,
+    )
+    return int(result.stderr.strip().splitlines()[-1])
+
+
+def test_score_matches_loader(export_rows):
+    header, *submissions = export_rows
+    compiled = load_manifest(pathlib.Path(MANIFEST))
+    expected = "".join(
+        Loader(compiled, [header, row]).get_string() + "\n"
+        for row in submissions
+    )
+    result = CliRunner().invoke(cli, ["score", EXPORT, "--manifest", MANIFEST])
+    assert(result.exit_code == 0)
+    assert(result.output == expected)
+
+
+def test_score_writes_to_output_file(tmp_path):
+    out = tmp_path / "scores.txt"
+    result = CliRunner().invoke(
+        cli, ["score", EXPORT, "--manifest", MANIFEST, "-o", str(out)]
+    )
+    assert(result.exit_code == 0)
+    assert(out.read_text().startswith("Lock Wallace Agreement: 19.0\n"))
+
+
+def test_peak_rss_does_not_grow_with_export_size(tmp_path, export_rows):
+    small = tmp_path / "small.csv"
+    large = tmp_path / "large.csv"
+    write_export(small, export_rows, 200)
+    write_export(large, export_rows, 5000)
+    # holding the large export in memory would cost well over 100MB
+    assert(peak_rss_kb(large) - peak_rss_kb(small) < 10 * 1024)
+
+
+def test_score_with_workers_matches_serial(tmp_path, export_rows):
+    export = tmp_path / "export.csv"
+    write_export(export, export_rows, 50)
+    args = ["score", str(export), "--manifest", MANIFEST]
+    serial = CliRunner().invoke(cli, args)
+    parallel = CliRunner().invoke(cli, args + ["--workers", "2", "--chunk-size", "7"])
+    assert(parallel.exit_code == 0)
+    assert(parallel.output == serial.output)
+
+
+def test_score_workers_quarantine_what_they_cannot_score(tmp_path, export_rows):
+    header, *submissions = export_rows
+    export = tmp_path / "export.csv"
+    quarantine = tmp_path / "quarantine.jsonl"
+    rows = [header, *(list(submissions[i % 2]) for i in range(20))]
+    rows[12][19] = "Sometimes"
+    write_rows(export, rows)
+    args = [
+        "score", str(export), "--manifest", MANIFEST, "--format", "csv",
+        "--on-error", "quarantine", "--quarantine", str(quarantine),
+    ]
+    serial = cli_runner().invoke(cli, args + ["--no-cache"])
+    serial_failures = quarantine.read_text()
+    parallel = cli_runner().invoke(cli, args + ["--workers", "2", "--chunk-size", "3"])
+    assert(parallel.exit_code == 0)
+    assert(parallel.stdout == serial.stdout)
+    assert(quarantine.read_text() == serial_failures)
+    assert([json.loads(line)["submission"] for line in quarantine.open()] == [11])
+
+
+def test_score_jsonl_format():
+    result = CliRunner().invoke(
+        cli, ["score", EXPORT, "--manifest", MANIFEST, "--format", "jsonl"]
+    )
+    assert(result.exit_code == 0)
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert(len(records) == 2)
+    assert(records[0]["Lock Wallace Agreement"] == 19.0)
+
+
+def test_score_only_selected_labels():
+    result = CliRunner().invoke(cli, [
+        "score", EXPORT, "--manifest", MANIFEST, "--format", "jsonl",
+        "--only", "Lock Wallace Agreement",
+    ])
+    assert(result.exit_code == 0)
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert(records[0] == {"submission": 0, "Lock Wallace Agreement": 19.0})
+    result = CliRunner().invoke(
+        cli, ["score", EXPORT, "--manifest", MANIFEST, "--only", "nope"]
+    )
+    assert(result.exit_code == 2)
+
+
+def test_score_profile_writes_descriptor_timings(tmp_path):
+    profile_path = tmp_path / "profile.json"
+    result = cli_runner().invoke(cli, [
+        "score", EXPORT, "--manifest", MANIFEST, "--no-cache",
+        "--profile", str(profile_path), "--profile-top", "3",
+    ])
+    assert(result.exit_code == 0)
+    assert(result.stdout == cli_runner().invoke(
+        cli, ["score", EXPORT, "--manifest", MANIFEST, "--no-cache"]
+    ).stdout)
+    entries = json.loads(profile_path.read_text())["entries"]
+    assert({"validate", "parse", "sink", "preload 0", "preload 1"} <= set(entries))
+    assert(entries["cargo 0 (Lock Wallace Agreement)"]["calls"] == 2)
+    assert(len(result.stderr.splitlines()) == 4)
+
+
+def test_score_single_submission(tmp_path, export_rows):
+    export = tmp_path / "export.csv"
+    write_export(export, export_rows, 5)
+    args = ["score", str(export), "--manifest", MANIFEST]
+    everything = CliRunner().invoke(cli, args).output.split("\n\n")
+    single = CliRunner().invoke(cli, args + ["--submission", "3"])
+    assert(single.exit_code == 0)
+    assert(single.output == everything[3] + "\n\n")
+    missing = CliRunner().invoke(cli, args + ["--submission", "5"])
+    assert(missing.exit_code != 0)
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_score_numpy_backend_matches_python(tmp_path, export_rows):
+    export = tmp_path / "export.csv"
+    write_export(export, export_rows, 30)
+    args = ["score", str(export), "--manifest", MANIFEST, "--chunk-size", "7"]
+    python = CliRunner().invoke(cli, args)
+    numpy = CliRunner().invoke(cli, args + ["--backend", "numpy"])
+    assert(numpy.exit_code == 0)
+    assert(numpy.output == python.output)
+
+
+def test_score_with_checkpoint_appends_new_rows(tmp_path, export_rows):
+    header, *submissions = export_rows
+    export = tmp_path / "export.csv"
+    out = tmp_path / "scores.csv"
+    args = [
+        "score", str(export), "--manifest", MANIFEST, "--format", "csv",
+        "-o", str(out), "--checkpoint", str(tmp_path / "checkpoint.json"),
+    ]
+    write_export(export, export_rows, 3)
+    assert(CliRunner().invoke(cli, args).exit_code == 0)
+    with export.open("a", newline="") as f:
+        csv.writer(f).writerows(submissions)
+    assert(CliRunner().invoke(cli, args).exit_code == 0)
+    with out.open(newline="") as f:
+        scored = list(csv.reader(f))
+    assert(len(scored) == 6)
+    assert(scored[0][:2] == ["submission", "Lock Wallace Agreement"])
+    assert([row[0] for row in scored[1:]] == ["0", "1", "2", "3", "4"])
+
+
+def test_failed_resume_leaves_no_rows_behind(tmp_path, export_rows):
+    header, *submissions = export_rows
+    export = tmp_path / "export.csv"
+    out = tmp_path / "scores.csv"
+    args = [
+        "score", str(export), "--manifest", MANIFEST, "--format", "csv",
+        "-o", str(out), "--checkpoint", str(tmp_path / "checkpoint.json"),
+        "--chunk-size", "7",
+    ]
+    write_export(export, export_rows, 3)
+    assert(CliRunner().invoke(cli, args).exit_code == 0)
+    scored = out.read_bytes()
+    appended = [list(submissions[i % 2]) for i in range(30)]
+    appended[-1][19] = "Sometimes"
+    write_rows(export, [header, *(submissions * 2)[:3], *appended])
+    assert(CliRunner().invoke(cli, args).exit_code != 0)
+    assert(out.read_bytes() == scored)
+
+    # a run killed before it could clean up leaves its rows in the output
+    with out.open("a", newline="") as f:
+        f.write("3,partial\r\n")
+    appended[-1][19] = "Occasionally Disagree"
+    write_rows(export, [header, *(submissions * 2)[:3], *appended])
+    assert(CliRunner().invoke(cli, args).exit_code == 0)
+    with out.open(newline="") as f:
+        numbers = [row[0] for row in csv.reader(f)][1:]
+    assert(numbers == [str(n) for n in range(33)])
+
+
+def test_score_reuses_cache_unless_disabled(tmp_path):
+    cache = tmp_path / "results.sqlite"
+    args = [
+        "score", EXPORT, "--manifest", MANIFEST, "--cache", str(cache),
+        "--cache-stats",
+    ]
+    first = cli_runner().invoke(cli, args)
+    second = cli_runner().invoke(cli, args)
+    assert("cache: 0 hits, 2 misses" in first.stderr)
+    assert("cache: 2 hits, 0 misses" in second.stderr)
+    assert(first.stdout == second.stdout)
+    disabled = cli_runner().invoke(cli, args + ["--no-cache"])
+    assert(disabled.stderr == "")
+    assert(disabled.stdout == first.stdout)
+
+
+def test_score_many_writes_one_output_per_manifest(tmp_path):
+    other = tmp_path / "lock_wallace.json"
+    manifest = json.loads(pathlib.Path(MANIFEST).read_text())
+    manifest["cargo"] = manifest["cargo"][:1]
+    other.write_text(json.dumps(manifest))
+    result = CliRunner().invoke(cli, [
+        "score-many", EXPORT, "--manifest", MANIFEST, "--manifest", str(other),
+        "--output-dir", str(tmp_path / "out"),
+    ])
+    assert(result.exit_code == 0)
+    gottman = CliRunner().invoke(cli, ["score", EXPORT, "--manifest", MANIFEST])
+    assert((tmp_path / "out" / "gottman_manifest.text").read_text() == gottman.output)
+    assert((tmp_path / "out" / "lock_wallace.text").read_text() ==
+           "Lock Wallace Agreement: 19.0\n\nLock Wallace Agreement: 16.0\n\n")
+
+
+def write_rows(path, rows):
+    with path.open("w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def read_scores(path):
+    with path.open(newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_score_quarantines_then_rescores_failed_submissions(tmp_path, export_rows):
+    header, *submissions = export_rows
+    export = tmp_path / "export.csv"
+    out = tmp_path / "scores.csv"
+    quarantine = tmp_path / "export.csv.quarantine.jsonl"
+    rows = [header, *(list(row) for row in submissions * 2)]
+    rows[2][19] = "Sometimes"
+    write_rows(export, rows)
+    args = [
+        "score", str(export), "--manifest", MANIFEST, "--format", "csv",
+        "-o", str(out),
+    ]
+    result = cli_runner().invoke(cli, [*args, "--on-error", "quarantine"])
+    assert(result.exit_code == 0)
+    assert(f"1 submissions quarantined to {quarantine}" in result.stderr)
+    [failure] = [json.loads(line) for line in quarantine.open()]
+    assert(failure["submission"] == 1 and failure["value"] == "Sometimes")
+    assert([row[0] for row in read_scores(out)] == ["submission", "0", "2", "3"])
+
+    rows[2][19] = "Occasionally Disagree"
+    write_rows(export, rows)
+    result = cli_runner().invoke(cli, [*args, "--rescore-quarantine"])
+    assert(result.exit_code == 0)
+    assert(quarantine.read_text() == "")
+    rescored = read_scores(out)
+    clean = tmp_path / "clean.csv"
+    cli_runner().invoke(cli, [*args[:-1], str(clean)])
+    # the rescored submission is appended, carrying its own number
+    assert(rescored[-1][0] == "1")
+    assert(sorted(rescored[1:], key=lambda row: int(row[0])) == read_scores(clean)[1:])
+
+    for invalid in (
+        ["--rescore-quarantine", "--submission", "1"],
+        ["--rescore-quarantine", "--on-error", "skip"],
+        ["--rescore-quarantine", "--on-error", "fail"],
+        ["--on-error", "skip", "--format", "text"],
+        ["--rescore-quarantine", "--format", "text"],
+    ):
+        result = cli_runner().invoke(cli, [*args, *invalid])
+        assert(result.exit_code == 2)
+    assert(read_scores(out) == rescored)
+
+
+def test_resumed_run_keeps_earlier_quarantined_submissions(tmp_path, export_rows):
+    header, *submissions = export_rows
+    export = tmp_path / "export.csv"
+    quarantine = tmp_path / "quarantine.jsonl"
+    bad = list(submissions[0])
+    bad[19] = "Sometimes"
+    write_rows(export, [header, bad, submissions[1]])
+    args = [
+        "score", str(export), "--manifest", MANIFEST, "--format", "jsonl",
+        "-o", str(tmp_path / "out.jsonl"), "--checkpoint", str(tmp_path / "checkpoint.json"),
+        "--on-error", "quarantine", "--quarantine", str(quarantine),
+    ]
+    assert(CliRunner().invoke(cli, args).exit_code == 0)
+    with export.open("a", newline="") as f:
+        csv.writer(f).writerows([bad])
+    assert(CliRunner().invoke(cli, args).exit_code == 0)
+    assert([
+        json.loads(line)["submission"] for line in quarantine.open()
+    ] == [0, 2])
+
+
+def test_score_sqlite_keys_rows_by_submission_number(tmp_path, export_rows):
+    header, *submissions = export_rows
+    export = tmp_path / "export.csv"
+    db_path = tmp_path / "scores.sqlite"
+    rows = [header, *(list(row) for row in submissions * 2)]
+    rows[1][19] = "Sometimes"
+    write_rows(export, rows)
+    args = [
+        "score", str(export), "--manifest", MANIFEST, "--format", "sqlite",
+        "-o", str(db_path),
+    ]
+    assert(CliRunner().invoke(cli, [*args, "--on-error", "quarantine"]).exit_code == 0)
+    rows[1][19] = submissions[0][19]
+    write_rows(export, rows)
+    assert(CliRunner().invoke(cli, [*args, "--rescore-quarantine"]).exit_code == 0)
+    db = sqlite3.connect(str(db_path))
+    assert(db.execute(
+        'SELECT submission, "Lock Wallace Agreement" FROM scores ORDER BY submission'
+    ).fetchall() == [(0, 19.0), (1, 16.0), (2, 19.0), (3, 16.0)])
+    single = tmp_path / "single.sqlite"
+    CliRunner().invoke(cli, [*args[:-1], str(single), "--submission", "3"])
+    assert(sqlite3.connect(str(single)).execute(
+        "SELECT submission FROM scores"
+    ).fetchall() == [(3,)])
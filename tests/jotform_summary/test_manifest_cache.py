@@ -0,0 +1,79 @@
+import json
+import pathlib
+import subprocess
+import sys
+from jotform_summary import manifest_cache
+from jotform_summary.manifest_cache import load_compiled_manifest
+from jotform_summary.options import OUTPUT_FORMATS
+from jotform_summary.sinks import SINKS
+
+MANIFEST = 'test_data/gottman_manifest.json'
+
+
+def test_second_load_skips_validation(tmp_path, monkeypatch, export_rows):
+    header, row, _ = export_rows
+    first = load_compiled_manifest(MANIFEST, cache_dir=tmp_path)
+    assert(len(list(tmp_path.glob("*.pickle"))) == 1)
+
+    def compile_manifest(*args):
+        raise AssertionError("manifest was validated again")
+    monkeypatch.setattr(manifest_cache, "compile_manifest", compile_manifest)
+    cached = load_compiled_manifest(MANIFEST, cache_dir=tmp_path)
+    assert(cached.fingerprint == first.fingerprint)
+    assert(cached.values([header, list(row)]) == first.values([header, list(row)]))
+
+
+def test_cache_is_keyed_by_content_and_only(tmp_path, export_rows):
+    manifest_path = tmp_path / "manifest.json"
+    manifest = json.loads(pathlib.Path(MANIFEST).read_text())
+    manifest_path.write_text(json.dumps(manifest))
+    cache_dir = tmp_path / "cache"
+    full = load_compiled_manifest(manifest_path, cache_dir=cache_dir)
+    only = load_compiled_manifest(
+        manifest_path, only=["Lock Wallace Agreement"], cache_dir=cache_dir
+    )
+    assert(len(only.output_steps(export_rows[0])) == 1)
+    manifest["cargo"] = manifest["cargo"][:1]
+    manifest_path.write_text(json.dumps(manifest))
+    changed = load_compiled_manifest(manifest_path, cache_dir=cache_dir)
+    assert(len(changed.cargo) == 1 and len(full.cargo) == 17)
+    assert(len(list(cache_dir.glob("*.pickle"))) == 3)
+
+
+def test_cache_is_keyed_by_package_source(tmp_path, monkeypatch):
+    load_compiled_manifest(MANIFEST, cache_dir=tmp_path)
+    monkeypatch.setattr(manifest_cache, "code_fingerprint", lambda: "upgraded")
+    load_compiled_manifest(MANIFEST, cache_dir=tmp_path)
+    assert(len(list(tmp_path.glob("*.pickle"))) == 2)
+
+
+def test_unreadable_cache_entry_is_recompiled(tmp_path, export_rows):
+    load_compiled_manifest(MANIFEST, cache_dir=tmp_path)
+    entry, = tmp_path.glob("*.pickle")
+    entry.write_bytes(b"not a pickle")
+    compiled = load_compiled_manifest(MANIFEST, cache_dir=tmp_path)
+    assert(compiled.values(export_rows[:2])[0] == 19.0)
+
+
+def test_cli_import_defers_heavy_modules():
+    script = (
+        "import sys\n"
+        "import jotform_summary.main\n"
+        "heavy = {'asyncio', 'numpy', 'concurrent.futures', 'pydantic', 'sqlite3'}\n"
+        "print(sorted(heavy & set(sys.modules)))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert(result.stdout.strip() == "[]")
+
+
+def test_cli_output_formats_match_the_sinks():
+    assert(list(OUTPUT_FORMATS) == [*SINKS, "sqlite"])
+
+
+def test_cache_is_keyed_by_pydantic_version(tmp_path, monkeypatch):
+    load_compiled_manifest(MANIFEST, cache_dir=tmp_path)
+    monkeypatch.setattr(manifest_cache.pydantic, "VERSION", "0.0")
+    load_compiled_manifest(MANIFEST, cache_dir=tmp_path)
+    assert(len(list(tmp_path.glob("*.pickle"))) == 2)
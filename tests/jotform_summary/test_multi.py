@@ -0,0 +1,61 @@
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.multi import MultiManifestRunner
+from jotform_summary.sinks import StringSink
+
+lock_wallace = {
+    "preload": [{
+        "col_num": {"ranges": [[19, 26]]},
+        "map": {"map_type": "range", "range_map": {
+            "Always Agree": 5, "Almost Always Agree": 4,
+            "Occasionally Disagree": 3, "Frequently Disagree": 2,
+            "Almost Always Disagree": 1, "Always Disagree": 0}}
+    }],
+    "cargo": [{
+        "load_type": "group", "label": "Agreement: ",
+        "cols": {"start": 19, "end": 26}, "reduce": "average"
+    }]
+}
+
+
+def test_each_manifest_scores_as_if_run_alone(gottman_manifest, export_rows):
+    gottman = gottman_manifest
+    header, *submissions = export_rows
+    original = [list(row) for row in submissions]
+    runner = MultiManifestRunner([gottman, lock_wallace])
+    sinks = [StringSink(separator="\n"), StringSink(separator="\n")]
+    assert(runner.write(header, submissions, sinks) == 2)
+    assert(submissions == original)
+    for manifest, sink in zip([gottman, lock_wallace], sinks):
+        expected = compile_manifest(manifest).score_batch(
+            header, [list(row) for row in submissions]
+        )
+        assert(sink.getvalue() == "".join(result + "\n" for result in expected))
+
+
+def test_identical_preloads_run_once_per_submission(gottman_manifest, export_rows):
+    gottman = gottman_manifest
+    header, *submissions = export_rows
+    runner = MultiManifestRunner([gottman, lock_wallace, lock_wallace])
+    list(runner.values_iter(header, submissions))
+    # gottman's lock wallace preload is the same step as lock_wallace's
+    assert(runner.preload_runs == 2 * len(submissions))
+    assert(runner.preload_reuses == 2 * len(submissions))
+
+
+def test_preload_reading_an_earlier_preload_is_not_shared():
+    chained = {
+        "preload": [
+            {"col_num": 0, "map": {"map_type": "binary", "is_one": "yes"}},
+            {"col_num": 0, "map": {"map_type": "binary", "is_one": "1"}},
+        ],
+        "cargo": [{"load_type": "group", "label": "c: ", "cols": [0, 1], "reduce": "sum"}]
+    }
+    plain = {
+        "preload": [{"col_num": 0, "map": {"map_type": "binary", "is_one": "1"}}],
+        "cargo": [{"load_type": "group", "label": "p: ", "cols": [0, 1], "reduce": "sum"}]
+    }
+    runner = MultiManifestRunner([chained, plain])
+    results = list(runner.values_iter(["a", "b"], [["yes", 2]]))
+    # chained maps "yes" -> 1, then 1 == "1" is False -> 0
+    assert(results == [[[2.0], [2.0]]])
+    assert(runner.preload_reuses == 0)
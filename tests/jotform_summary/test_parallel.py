@@ -0,0 +1,15 @@
+from jotform_summary.csv_mapping import score_batch
+from jotform_summary.parallel import chunked, score_parallel
+
+
+def test_chunked():
+    assert(list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]])
+    assert(list(chunked([], 2)) == [])
+
+
+def test_parallel_matches_serial_order(gottman_manifest, export_rows):
+    header, *submissions = export_rows
+    rows = [list(submissions[i % 2]) for i in range(41)]
+    expected = score_batch(gottman_manifest, header, [list(row) for row in rows])
+    results = list(score_parallel(gottman_manifest, header, rows, workers=2, chunk_size=3))
+    assert(results == expected)
@@ -0,0 +1,52 @@
+import pytest
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.profiling import Profile
+from jotform_summary.reducers import np
+from jotform_summary.sinks import StringSink
+from jotform_summary.vectorized import values_batch
+
+manifest = {
+    "preload": [
+        {"col_num": {"ranges": [[1, 3]]}, "map": {"map_type": "binary", "is_one": "True"}}
+    ],
+    "cargo": [
+        {"load_type": "scalar", "label": "Name: ", "col_num": 0, "row_num": 1},
+        {"load_type": "group", "label": "g: ", "name": "g", "cols": [1, 2, 3], "reduce": "sum"},
+    ]
+}
+header = ["name", "q1", "q2", "q3"]
+rows = [["Carl", "True", "False", "True"], ["Wilma", "True", "True", "True"]]
+
+
+def test_profiled_manifest_scores_like_compiled_manifest():
+    profile = Profile()
+    profiled = profile.instrument(compile_manifest(manifest))
+    expected = list(compile_manifest(manifest).values_iter(header, [list(row) for row in rows]))
+    assert(list(profiled.values_iter(header, [list(row) for row in rows])) == expected)
+    entries = profile.report()["entries"]
+    assert(entries["preload 0"]["calls"] == 2)
+    assert(entries["preload 0"]["cells"] == 6)
+    assert(entries["cargo 0 (name)"]["cells"] == 2)
+    assert(entries["cargo 1 (g)"]["cells"] == 6)
+
+
+def test_profile_times_rows_and_sink():
+    profile = Profile()
+    sink = profile.sink(StringSink())
+    compiled = profile.instrument(compile_manifest(manifest))
+    rows_iter = profile.rows("parse", iter([header, *[list(row) for row in rows]]))
+    header_row = next(rows_iter)
+    compiled.write(header_row, rows_iter, sink)
+    entries = profile.report()["entries"]
+    assert(entries["parse"]["calls"] == 3)
+    assert(entries["sink"]["cells"] == 4)
+    assert("cargo 1 (g)" in profile.table(top=3))
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_profile_counts_vectorized_group_reductions():
+    profile = Profile()
+    profiled = profile.instrument(compile_manifest(manifest))
+    values = values_batch(profiled, header, [list(row) for row in rows], backend="numpy")
+    assert(values == [["", 2.0], ["", 3.0]])
+    assert(profile.report()["entries"]["cargo 1 (g)"]["cells"] == 6)
@@ -0,0 +1,94 @@
+import pytest
+from jotform_summary.csv_mapping import RangeMappingException, compile_manifest
+from jotform_summary.pipeline import score_rows
+from jotform_summary.quarantine import Quarantine, read_quarantine
+from jotform_summary.sinks import JsonLinesSink, StringSink
+
+
+@pytest.fixture
+def compiled(gottman_manifest):
+    return compile_manifest(gottman_manifest)
+
+
+@pytest.fixture
+def rows(export_rows):
+    # the fixture's submissions three times over; submission 1 has an answer
+    # the first preload's range map does not know
+    header, *submissions = export_rows
+    submissions = [list(row) for row in submissions * 3]
+    submissions[1][19] = "Sometimes"
+    return [header, *submissions]
+
+
+def score(compiled, rows, on_error, quarantine=None, chunk_size=500):
+    sink = StringSink()
+    score_rows(
+        compiled, iter([list(row) for row in rows]), sink,
+        chunk_size=chunk_size, on_error=on_error, quarantine=quarantine,
+    )
+    return sink.getvalue()
+
+
+def test_fail_raises(compiled, rows):
+    with pytest.raises(RangeMappingException):
+        score(compiled, rows, "fail")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_skip_scores_every_other_submission(compiled, rows, chunk_size):
+    header, *submissions = rows
+    good = [list(row) for i, row in enumerate(submissions) if i != 1]
+    expected = StringSink()
+    compiled.write(header, good, expected)
+    assert(score(compiled, rows, "skip", chunk_size=chunk_size) == expected.getvalue())
+
+
+def test_quarantine_records_submission_descriptor_and_value(tmp_path, compiled, rows):
+    path = tmp_path / "quarantine.jsonl"
+    with Quarantine(path) as quarantine:
+        score(compiled, rows, "quarantine", quarantine)
+    assert(quarantine.count == 1)
+    [failure] = read_quarantine(path)
+    assert(failure.submission == 1)
+    assert(failure.descriptor == "preload 0")
+    assert(failure.value == "Sometimes")
+    assert(failure.error)
+
+
+def test_short_row_is_quarantined(tmp_path, compiled, rows):
+    rows[4] = rows[4][:10]
+    path = tmp_path / "quarantine.jsonl"
+    out = tmp_path / "scores.jsonl"
+    with Quarantine(path) as quarantine, out.open("w") as f:
+        score_rows(
+            compiled, iter(rows), JsonLinesSink(f), chunk_size=2,
+            on_error="quarantine", quarantine=quarantine,
+        )
+    assert([
+        (failure.submission, failure.descriptor, failure.value)
+        for failure in read_quarantine(path)
+    ] == [(1, "preload 0", "Sometimes"), (3, "row", 10)])
+    assert(out.read_text().count('"submission"') == 4)
+    assert('"submission": 3' not in out.read_text())
+
+
+def test_quarantine_names_failing_reducer_cells(tmp_path):
+    manifest = {
+        "cargo": [
+            {"load_type": "scalar", "label": "Name: ", "col_num": 0, "row_num": 1},
+            {"load_type": "group", "label": "g: ", "cols": [1, 2], "reduce": "sum"},
+        ]
+    }
+    path = tmp_path / "quarantine.jsonl"
+    sink = StringSink()
+    with Quarantine(path) as quarantine:
+        score_rows(
+            compile_manifest(manifest),
+            iter([["name", "q1", "q2"], ["a", 1, 2], ["b", 3, "x"]]),
+            sink, on_error="quarantine", quarantine=quarantine,
+        )
+    assert(sink.getvalue() == "name\ng: 3.0\n")
+    [failure] = read_quarantine(path)
+    assert(failure.submission == 1)
+    assert(failure.descriptor == "cargo 1 (g)")
+    assert(failure.value == [3, "x"])
@@ -0,0 +1,74 @@
+import csv
+import os
+import pytest
+from jotform_summary.reader import (
+    ExportIndex, ExportIndexException, ExportReader, read_records, record_offsets
+)
+
+
+def test_record_offsets_ignore_quoted_newlines():
+    data = b'a,b\n"x\ny",1\n"say ""hi""\n",2\r\nlast,3'
+    offsets = list(record_offsets(data))
+    records = [data[s:e] for s, e in zip(offsets, offsets[1:])]
+    assert(records == [b'a,b\n', b'"x\ny",1\n', b'"say ""hi""\n",2\r\n', b'last,3'])
+
+
+def test_record_offsets_unterminated_quote():
+    with pytest.raises(ExportIndexException):
+        record_offsets(b'a,"b\n')
+
+
+def test_record_offsets_empty():
+    assert(list(record_offsets(b"")) == [0])
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_bytes(b"h1,h2\n1,2\n")
+    with ExportReader(export) as reader:
+        assert(reader.submission_count() == 1)
+    export.write_bytes(b'h1,h2\n1,2\n"3\n",4\n')
+    stat = export.stat()
+    os.utime(export, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert(ExportIndex.load(export) is None)
+    with ExportReader(export) as reader:
+        assert(reader.submission(1) == ["3\n", "4"])
+
+
+def test_unwritable_index_is_kept_in_memory(tmp_path, monkeypatch):
+    export = tmp_path / "export.csv"
+    export.write_bytes(b"h1,h2\n1,2\n")
+
+    def save(self, export_path):
+        raise PermissionError(13, "Permission denied", str(export_path))
+    monkeypatch.setattr(ExportIndex, "save", save)
+    with ExportReader(export) as reader:
+        assert(reader.submission(0) == ["1", "2"])
+    assert(not ExportIndex.path_for(export).exists())
+
+
+def test_byte_ranges_cover_every_submission(tmp_path):
+    export = tmp_path / "export.csv"
+    with export.open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["h"])
+        for i in range(10):
+            writer.writerow([f"line {i}\nstill {i}"])
+    with ExportReader(export, persist_index=False) as reader:
+        ranges = reader.byte_ranges(3)
+        assert(len(ranges) == 3)
+        rows = [row for start, end in ranges for row in reader.rows(start, end)]
+    assert(rows == [[f"line {i}\nstill {i}"] for i in range(10)])
+    assert(not ExportIndex.path_for(export).exists())
+
+
+def test_submission_ranges_are_read_back_by_number(tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_bytes(
+        b"\xef\xbb\xbfh\r\n" + b"".join(f'"line {i}\nstill"\r\n'.encode() for i in range(7))
+    )
+    with ExportReader(export, persist_index=False) as reader:
+        ranges = list(reader.submission_ranges(3))
+    assert([first for first, start, end in ranges] == [0, 3, 6])
+    rows = [row for first, start, end in ranges for row in read_records(export, start, end)]
+    assert(rows == [[f"line {i}\nstill"] for i in range(7)])
@@ -0,0 +1,69 @@
+import pytest
+from pydantic import ValidationError
+from jotform_summary.csv_mapping import Loader, compile_manifest
+from jotform_summary.reducers import REDUCERS, np, register_reducer
+from jotform_summary.vectorized import values_batch
+
+header = ["q1", "q2", "q3", "q4"]
+rows = [[1, 0, 3, 1], [2, 5, 0, 0], [0, 0, 0, 1]]
+
+
+def group(reduce, cols={"start": 0, "end": 3}):
+    return {
+        "load_type": "group",
+        "label": "g: ",
+        "row_num": 1,
+        "cols": cols,
+        "reduce": reduce
+    }
+
+
+@pytest.mark.parametrize("reduce, expected", [
+    ("min", "g: 0.0\n"),
+    ("max", "g: 3.0\n"),
+    ("count_true", "g: 3.0\n"),
+    ("percentage", "g: 125.0\n"),
+    ({"weighted_sum": [0.5, 1, 2, 4]}, "g: 10.5\n"),
+])
+def test_new_reducers(reduce, expected):
+    loader = Loader({"cargo": [group(reduce)]}, [header, list(rows[0])])
+    assert(loader.get_string() == expected)
+
+
+def test_weighted_sum_needs_a_weight_per_column():
+    with pytest.raises(ValueError):
+        Loader({"cargo": [group({"weighted_sum": [1, 2]})]}, [header, list(rows[0])])
+
+
+def test_unknown_reducer_rejected():
+    with pytest.raises(ValidationError):
+        compile_manifest({"cargo": [group("median")]})
+
+
+def test_registered_reducer_is_usable():
+    register_reducer("first", lambda group: float(group[0]), lambda m: m[:, 0])
+    try:
+        loader = Loader({"cargo": [group("first")]}, [header, list(rows[1])])
+        assert(loader.get_string() == "g: 2.0\n")
+    finally:
+        del REDUCERS["first"]
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_numpy_backend_matches_python():
+    reduces = [
+        "sum", "multiple", "average", "min", "max", "count_true", "percentage",
+        {"sum_then_multiply_by": 3}, {"average_then_multiply_by": 7},
+        {"weighted_sum": [0.1, 0.2, 0.3]},
+    ]
+    compiled = compile_manifest({"cargo": [
+        group(reduce, [3, 0, 2]) if type(reduce) == dict and "weighted_sum" in reduce
+        else group(reduce)
+        for reduce in reduces
+    ] + [group("sum", [2])]})
+    python = values_batch(compiled, header, [list(row) for row in rows], backend="python")
+    numpy = values_batch(compiled, header, [list(row) for row in rows], backend="numpy")
+    assert(numpy == python)
+    assert(python == list(compiled.values_iter(header, [list(row) for row in rows])))
+    assert([list(map(str, values)) for values in numpy] ==
+           [list(map(str, values)) for values in python])
@@ -0,0 +1,171 @@
+import asyncio
+import csv
+import io
+import json
+import pathlib
+import time
+from jotform_summary.csv_mapping import compile_manifest
+from jotform_summary.server import ScoringServer, parse_payload
+from jotform_summary.sinks import JsonLinesSink
+
+MANIFEST = 'test_data/gottman_manifest.json'
+EXPORT = 'test_data/submission.csv'
+
+
+def load():
+    with pathlib.Path(MANIFEST).open() as f:
+        compiled = compile_manifest(json.load(f))
+    with pathlib.Path(EXPORT).open(newline="") as f:
+        header, *submissions = list(csv.reader(f))
+    return compiled, header, submissions
+
+
+async def request(port, method, path, body=b"", content_type="application/json"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+class SlowSink(JsonLinesSink):
+    def write(self, values):
+        time.sleep(0.2)
+        super().write(values)
+
+
+class FailOnceSink(JsonLinesSink):
+    def __init__(self, file):
+        super().__init__(file)
+        self.failed = False
+
+    def write(self, values):
+        if not self.failed:
+            self.failed = True
+            raise OSError("disk full")
+        super().write(values)
+
+
+def form_data(fields):
+    body = b""
+    for name, value in fields:
+        name = name.replace("\\", "\\\\").replace('"', '\\"')
+        body += (
+            f'--boundary\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+            f"{value}\r\n"
+        ).encode()
+    return body + b"--boundary--\r\n"
+
+
+def serve(test, sink=JsonLinesSink, **options):
+    compiled, header, submissions = load()
+    out = io.StringIO()
+    server = ScoringServer(compiled, header, sink(out), **options)
+
+    async def main():
+        port = await server.start(port=0)
+        try:
+            return await test(port, header, submissions)
+        finally:
+            await server.close()
+    return asyncio.run(main()), out.getvalue(), server
+
+
+def test_posted_submissions_are_scored_in_batches():
+    async def test(port, header, submissions):
+        by_name = [dict(zip(header, row)) for row in submissions]
+        bodies = [json.dumps(row).encode() for row in submissions]
+        bodies += [json.dumps(payload).encode() for payload in by_name]
+        responses = await asyncio.gather(*(
+            request(port, "POST", "/submissions", body) for body in bodies
+        ))
+        stats = await request(port, "GET", "/stats")
+        return responses, stats
+
+    (responses, stats), output, server = serve(test, batch_size=4, batch_timeout=1)
+    assert([status for status, _ in responses] == [200] * 4)
+    records = [record for _, record in responses]
+    assert(records[0]["Lock Wallace Agreement"] == 19.0)
+    assert(records[:2] == records[2:])
+    assert(sorted(json.loads(line)["Lock Wallace Agreement"] for line in output.splitlines())
+           == sorted(record["Lock Wallace Agreement"] for record in records))
+    status, stats = stats
+    assert(stats["scored"] == 4 and stats["batches"] == 1)
+    assert(stats["p50_ms"] <= stats["p99_ms"])
+
+
+def test_bad_submissions_are_rejected_without_failing_the_batch():
+    async def test(port, header, submissions):
+        bad = list(submissions[0])
+        bad[19] = "Sometimes"
+        return await asyncio.gather(
+            request(port, "POST", "/submissions", json.dumps(bad).encode()),
+            request(port, "POST", "/submissions", json.dumps(submissions[1]).encode()),
+            request(port, "POST", "/submissions", b"[1, 2]"),
+            request(port, "POST", "/elsewhere", b"{}"),
+        )
+
+    responses, output, _ = serve(test, batch_size=2, batch_timeout=1)
+    assert([status for status, _ in responses] == [422, 200, 400, 404])
+    assert(len(output.splitlines()) == 1)
+
+
+def test_full_queue_answers_503():
+    async def test(port, header, submissions):
+        body = json.dumps(submissions[0]).encode()
+        return await asyncio.gather(*(
+            request(port, "POST", "/submissions", body) for _ in range(6)
+        ))
+
+    responses, _, _ = serve(
+        test, sink=SlowSink, batch_size=1, batch_timeout=0, queue_size=1
+    )
+    statuses = [status for status, _ in responses]
+    assert(set(statuses) == {200, 503})
+    assert(statuses.count(200) <= 2)
+
+
+def test_failed_batch_does_not_stop_the_server():
+    async def test(port, header, submissions):
+        body = json.dumps(submissions[0]).encode()
+        first = await request(port, "POST", "/submissions", body)
+        second = await request(port, "POST", "/submissions", body)
+        return first, second
+
+    (first, second), output, _ = serve(
+        test, sink=FailOnceSink, batch_size=1, batch_timeout=0
+    )
+    assert(first == (500, {"error": "could not score submission: disk full"}))
+    assert(second[0] == 200)
+    assert(len(output.splitlines()) == 1)
+
+
+def test_multipart_submissions_are_scored():
+    async def test(port, header, submissions):
+        fields = list(zip(header, submissions[0])) + [("formID", "1"), ("formID", "2")]
+        return await asyncio.gather(
+            request(port, "POST", "/submissions", json.dumps(submissions[0]).encode()),
+            request(
+                port, "POST", "/submissions", form_data(fields),
+                content_type="multipart/form-data; boundary=boundary",
+            ),
+            request(
+                port, "POST", "/submissions", b"no parts",
+                content_type="multipart/form-data; boundary=boundary",
+            ),
+        )
+
+    (by_json, by_form, bad), _, _ = serve(test)
+    assert(by_form == by_json and by_json[0] == 200)
+    assert(bad[0] == 400)
+
+
+def test_parse_form_data_keeps_repeated_fields():
+    body = form_data([("q", "a"), ("q", "b"), ("name", "ünï")])
+    assert(parse_payload("multipart/form-data; boundary=boundary", body)
+           == {"q": ["a", "b"], "name": "ünï"})
@@ -0,0 +1,145 @@
+import io
+import json
+import sqlite3
+import pytest
+from click.testing import CliRunner
+from jotform_summary.csv_mapping import Loader, LoaderException, compile_manifest
+from jotform_summary.main import cli
+from jotform_summary.sinks import CsvSink, JsonLinesSink, SqliteSink, TextSink
+
+manifest = {"cargo": [
+    {
+        "load_type": "scalar",
+        "label": "Comments: ",
+        "col_num": 2,
+        "row_num": 1,
+        "ignore_if_empty_string": True,
+        "map": {"map_type": "static_string", "output": "see notes"}
+    },
+    {
+        "load_type": "group",
+        "label": "Total: ",
+        "row_num": 1,
+        "cols": {"start": 0, "end": 1},
+        "reduce": "sum"
+    }
+]}
+header = ["a", "b", "comments"]
+
+
+def test_text_sink_writes_to_file():
+    out = io.StringIO()
+    Loader(manifest, [header, [1, 2, "hi"]], sink=TextSink(out))
+    assert(out.getvalue() == "Comments: see notes\nTotal: 3.0\n")
+
+
+def test_get_string_needs_default_sink():
+    loader = Loader(manifest, [header, [1, 2, "hi"]], sink=TextSink(io.StringIO()))
+    with pytest.raises(LoaderException):
+        loader.get_string()
+
+
+def test_json_lines_sink_one_record_per_submission():
+    out = io.StringIO()
+    compile_manifest(manifest).write(
+        header, [[1, 2, "hi"], [3, 4, ""]], JsonLinesSink(out)
+    )
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert(records == [
+        {"Comments": "see notes", "Total": 3.0},
+        {"Total": 7.0},
+    ])
+
+
+def test_repeated_labels_get_their_own_keys():
+    repeated = compile_manifest({"cargo": [
+        manifest["cargo"][1],
+        dict(manifest["cargo"][1], reduce="max"),
+        dict(manifest["cargo"][1], label="submission: ", reduce="min"),
+    ]})
+    jsonl, csv_out = io.StringIO(), io.StringIO()
+    for sink in (JsonLinesSink(jsonl), CsvSink(csv_out, numbered=True)):
+        sink.start(repeated.output_steps(header))
+        sink.write(repeated.values([header, [1, 2, "hi"]]), 4)
+    assert(json.loads(jsonl.getvalue()) == {
+        "submission": 4, "Total": 3.0, "Total (2)": 2.0, "submission (2)": 1.0,
+    })
+    assert(csv_out.getvalue().splitlines() == [
+        "submission,Total,Total (2),submission (2)", "4,3.0,2.0,1.0",
+    ])
+
+
+def test_csv_sink_one_column_per_cargo_item():
+    out = io.StringIO()
+    sink = CsvSink(out)
+    compiled = compile_manifest(manifest)
+    Loader(compiled, [header, [1, 2, "hi"]], sink=sink)
+    Loader(compiled, [header, [3, 4, ""]], sink=sink)
+    assert(out.getvalue().splitlines() == [
+        "Comments,Total",
+        "see notes,3.0",
+        ",7.0",
+    ])
+
+
+def test_sqlite_sink_typed_column_per_cargo_item(tmp_path):
+    path = tmp_path / "scores.sqlite"
+    compiled = compile_manifest(manifest)
+    with SqliteSink(path, batch_size=2) as sink:
+        compiled.write(header, [[1, 2, "hi"], [3, 4, ""], [5, 6, "x"]], sink)
+    db = sqlite3.connect(str(path))
+    columns = [(name, type) for _, name, type, *_ in db.execute("PRAGMA table_info(scores)")]
+    assert(columns == [("submission", "INTEGER"), ("Comments", "TEXT"), ("Total", "REAL")])
+    assert(db.execute("SELECT * FROM scores").fetchall() == [
+        (1, "see notes", 3.0), (2, None, 7.0), (3, "see notes", 11.0)
+    ])
+    assert(db.execute("PRAGMA journal_mode").fetchone() == ("wal",))
+
+
+def test_sinks_record_submission_numbers(tmp_path):
+    compiled = compile_manifest(manifest)
+    output_steps = compiled.output_steps(header)
+    values = compiled.values([header, [1, 2, "hi"]])
+    jsonl, csv_out = io.StringIO(), io.StringIO()
+    path = tmp_path / "scores.sqlite"
+    with SqliteSink(path) as sqlite_sink:
+        for sink in (JsonLinesSink(jsonl), CsvSink(csv_out, numbered=True), sqlite_sink):
+            sink.start(output_steps)
+            sink.write(values, 7)
+            sink.write(values, 0)
+            sink.write(values, 7)
+            sink.finish()
+    assert(json.loads(jsonl.getvalue().splitlines()[0]) ==
+           {"submission": 7, "Comments": "see notes", "Total": 3.0})
+    assert(csv_out.getvalue().splitlines()[:2] == ["submission,Comments,Total", "7,see notes,3.0"])
+    db = sqlite3.connect(str(path))
+    assert(db.execute("SELECT submission FROM scores ORDER BY submission").fetchall() ==
+           [(0,), (7,)])
+
+
+def test_sqlite_sink_replaces_or_appends(tmp_path):
+    path = tmp_path / "scores.sqlite"
+    compiled = compile_manifest(manifest)
+    for append in (False, False, True):
+        with SqliteSink(path, append=append) as sink:
+            compiled.write(header, [[1, 2, "hi"]], sink)
+    db = sqlite3.connect(str(path))
+    assert(db.execute("SELECT COUNT(*) FROM scores").fetchone() == (2,))
+
+
+def test_score_sqlite_format(tmp_path):
+    path = tmp_path / "scores.sqlite"
+    result = CliRunner().invoke(cli, [
+        "score", "test_data/submission.csv", "--manifest",
+        "test_data/gottman_manifest.json", "--format", "sqlite", "--output", str(path),
+    ])
+    assert(result.exit_code == 0)
+    db = sqlite3.connect(str(path))
+    assert(db.execute('SELECT "Lock Wallace Agreement" FROM scores').fetchall() == [
+        (19.0,), (16.0,)
+    ])
+    result = CliRunner().invoke(cli, [
+        "score", "test_data/submission.csv", "--manifest",
+        "test_data/gottman_manifest.json", "--format", "sqlite",
+    ])
+    assert(result.exit_code == 2)